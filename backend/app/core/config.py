@@ -1,6 +1,40 @@
-from typing import Optional
-from pydantic import Field
+import os
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import Any, Literal, Optional
+from dotenv import dotenv_values
+from pydantic import Field, PrivateAttr
 from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# Resolve the env file from the runtime environment once, rather than from a class-body default.
+# ENV_FILE overrides the path; production containers inject real environment variables and skip the file.
+_ENVIRONMENT = os.getenv('ENVIRONMENT', 'development')
+ENV_FILE: Optional[str] = os.getenv(
+    'ENV_FILE',
+    None if _ENVIRONMENT == 'production' else str(Path(__file__).parent.parent.parent / f'.env.{_ENVIRONMENT}')
+)
+
+
+@lru_cache(maxsize=1)
+def load_env_file() -> None:
+    """
+    Parse ENV_FILE once and push its values into os.environ.
+
+    Variables already set in the process environment win over the file. The settings
+    classes then read plain environment variables instead of re-parsing the file on
+    every construction.
+    """
+    if ENV_FILE is None or not Path(ENV_FILE).is_file():
+        return
+    os.environ.update({
+        key: value
+        for key, value in dotenv_values(ENV_FILE).items()
+        if value is not None and key not in os.environ
+    })
+
+
+load_env_file()
+
 class KafkaSettings(BaseSettings):
     """
     Kafka-specific settings loaded from environment variables.
@@ -8,17 +42,27 @@ class KafkaSettings(BaseSettings):
     ENVIRONMENT:str = 'development'
     model_config = SettingsConfigDict(
         case_sensitive=True,
-        env_file=f'.env.{ENVIRONMENT}',
-        extra='allow'
+        # The env file is already merged into os.environ by load_env_file()
+        env_file=None,
+        extra='allow',
+        # Settings never change after load: freeze the whole model instead of each field
+        frozen=True,
+        validate_default=False,
     )
 
     # Core Kafka settings
-    KAFKA_BOOTSTRAP_SERVERS: str = Field(frozen=True)
+    KAFKA_BOOTSTRAP_SERVERS: str
 
     # Producer settings
-    KAFKA_BATCH_SIZE: int = Field(ge=16384, frozen=True)
-    KAFKA_LINGER_MS: int = Field(ge=0, frozen=True)
-    KAFKA_GROUP_ID_BSKY: str = Field(frozen=True)
+    KAFKA_BATCH_SIZE: int = Field(ge=16384)
+    KAFKA_LINGER_MS: int = Field(ge=0)
+    # Unacknowledged sends allowed before produce_msg waits for the broker
+    KAFKA_BATCH_FLUSH_N: int = Field(default=1000, ge=1)
+    # Small JSON frames compress well in batches; lz4 is cheap on CPU
+    KAFKA_COMPRESSION_TYPE: Optional[Literal['gzip', 'snappy', 'lz4', 'zstd']] = 'lz4'
+    # Leader-only acknowledgement; -1 waits for all in-sync replicas
+    KAFKA_ACKS: int = Field(default=1, ge=-1, le=1)
+    KAFKA_GROUP_ID_BSKY: str
 
     # Consumer settings
     KAFKA_MAX_POLL_RECORDS: int = Field(ge=100, le=1000)
@@ -35,40 +79,68 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(
         case_sensitive=True,
-        env_file=f'.env.{ENVIRONMENT}',
-        extra='allow'
+        # The env file is already merged into os.environ by load_env_file()
+        env_file=None,
+        extra='allow',
+        # Settings never change after load: freeze the whole model instead of each field
+        frozen=True,
+        validate_default=False,
     )
 
     # PostgreSQL connection settings
-    RESET_DB: str = Field(frozen=True)
-    POSTGRES_USER: str = Field(frozen=True)
-    POSTGRES_PASSWORD: str = Field(frozen=True)
-    POSTGRES_HOST: str = Field(frozen=True)
-    POSTGRES_PORT: str = Field(frozen=True)
-    POSTGRES_DB: str = Field(frozen=True)
+    # Drop and recreate every table on startup (development only, destroys all data)
+    RESET_DB: bool = False
+    POSTGRES_USER: str
+    POSTGRES_PASSWORD: str
+    POSTGRES_HOST: str
+    POSTGRES_PORT: str
+    POSTGRES_DB: str
+    # Log every SQL statement through SQLAlchemy's engine logger (opt-in, debugging only)
+    ECHO_SQL: bool = False
 
     # API configuration
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "Bluesky Analytics"
 
-    @property
+    # The model is frozen, so derived values can be computed once per instance
+    @cached_property
     def DATABASE_URL(self) -> str:
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    _cors_origins: tuple[str, ...] = PrivateAttr(default=())
+
+    def model_post_init(self, __context: Any) -> None:
+        # Resolve CORS origins once so readers never branch on ENVIRONMENT
+        if self.ENVIRONMENT == "production":
+            self._cors_origins = ("https://bsky.app",)
+        else:
+            # Default to localhost for development and any other environment
+            self._cors_origins = ("http://localhost:3000",)
+
     @property
-    def CORS_ORIGINS(self) -> list[str]:
-        if self.ENVIRONMENT == "development":
-            return ["http://localhost:3000"]
-        elif self.ENVIRONMENT == "production":
-            return ["https://bsky.app"]
-        # Default to localhost for any other environment
-        return ["http://localhost:3000"]
-
-
-        
-        
-# Create global settings objects
+    def CORS_ORIGINS(self) -> tuple[str, ...]:
+        return self._cors_origins
+
+
+# Settings are parsed once per process and shared by every caller.
 # type: ignore comments are used here because Pydantic's BaseSettings
 # initialization can't be fully type-checked due to runtime environment variable loading
-settings = Settings()  # type: ignore
-kafka_settings = KafkaSettings()  # type: ignore
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the cached application settings."""
+    return Settings()  # type: ignore
+
+
+@lru_cache(maxsize=1)
+def get_kafka_settings() -> KafkaSettings:
+    """Return the cached Kafka settings."""
+    return KafkaSettings()  # type: ignore
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `from app.core.config import settings` working without parsing at import time
+    if name == 'settings':
+        return get_settings()
+    if name == 'kafka_settings':
+        return get_kafka_settings()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
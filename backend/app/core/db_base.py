@@ -0,0 +1,26 @@
+"""
+Declarative base for SQLAlchemy models.
+
+Kept separate from app.core.database so that importing the models (Alembic,
+tests, tooling) does not create an engine or read connection settings.
+"""
+
+from sqlalchemy import MetaData
+from sqlalchemy.orm import DeclarativeBase
+
+# Naming convention for constraints
+convention = {
+    "ix": "ix_%(column_0_label)s",
+    "uq": "uq_%(table_name)s_%(column_0_name)s",
+    "ck": "ck_%(table_name)s_%(constraint_name)s",
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+    "pk": "pk_%(table_name)s"
+}
+
+
+# Create base class for all models
+class Base(DeclarativeBase):
+    """Base class for all SQLAlchemy models"""
+    
+    # Apply metadata convention for consistent constraint naming
+    metadata = MetaData(naming_convention=convention)
@@ -1,24 +1,102 @@
 import logging
 import logging.handlers
+import queue
 from string import Formatter
 import sys
+import time
 from pathlib import Path
 import os
-from dotenv import load_dotenv
+import orjson
+from app.core.config import load_env_file
 
 root = Path(__file__).parent.parent.parent
-load_dotenv(root / '.env.development')
+# Share the settings env file instead of parsing a second copy here
+load_env_file()
 ENVIRONMENT = os.getenv('ENVIRONMENT')
 if ENVIRONMENT is None:
     raise ValueError(f'Missing env variable: ENVIRONMENT')
+# Optional override of the root level (e.g. LOG_LEVEL=INFO) so disabled levels short-circuit early
+LOG_LEVEL = os.getenv('LOG_LEVEL')
+
+# None of the formats use thread/process fields, so skip collecting them for every record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+CONSOLE_FORMAT = '[%(levelname)s] %(asctime)s %(name)s: %(message)s'
+FILE_FORMAT = '[%(levelname)s] %(name)s %(asctime)s: %(message)s'
+
+class CachedTimeFormatter(logging.Formatter):
+    """
+    Formatter that reuses the strftime result for records logged within the same second.
+    Only the millisecond suffix is formatted per record.
+    """
+    def __init__(self, fmt: str | None = None, datefmt: str | None = None) -> None:
+        super().__init__(fmt, datefmt)
+        self._cached_time: tuple[int, str] = (-1, '')
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+
+        second = int(record.created)
+        cached_second, cached_text = self._cached_time
+        if second != cached_second:
+            cached_text = time.strftime(self.default_time_format, self.converter(record.created))
+            self._cached_time = (second, cached_text)
+        return self.default_msec_format % (cached_text, record.msecs)
+
+class OrjsonFormatter(logging.Formatter):
+    """Formatter that emits each record as one JSON object per line for log aggregation."""
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "level": record.levelname,
+            "timestamp": record.created,
+            "name": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(payload).decode()
+
+# Root QueueHandler and the background listener that drains it into the real (blocking) handlers
+_queue_handler: logging.handlers.QueueHandler | None = None
+_queue_listener: logging.handlers.QueueListener | None = None
+
+def _start_queue_listener(root: logging.Logger, *handlers: logging.Handler) -> None:
+    global _queue_handler, _queue_listener
+    stop_logging()
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    _queue_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
+
+def stop_logging() -> None:
+    """Flush queued log records and stop the background listener."""
+    global _queue_handler, _queue_listener
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
 
 def setup_local_logging() -> None:
     root: logging.Logger = logging.getLogger()
-    root.setLevel(logging.DEBUG)
+    root.setLevel(LOG_LEVEL or logging.DEBUG)
+    # Keep SQLAlchemy's per-statement INFO logs out of the root handlers unless ECHO_SQL is set
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
+
+    # One formatter per format string, shared by every handler that uses it
+    console_formatter = CachedTimeFormatter(CONSOLE_FORMAT)
+    file_formatter = CachedTimeFormatter(FILE_FORMAT)
 
     stdout_handler = logging.StreamHandler(sys.stdout)
-    stdout_handler.setFormatter(logging.Formatter('[%(levelname)s] %(asctime)s %(name)s: %(message)s'))
-    root.addHandler(stdout_handler)
+    stdout_handler.setFormatter(console_formatter)
+    # Warnings and errors go to stderr only, so each record reaches the terminal once
+    stdout_handler.addFilter(lambda record: record.levelno < logging.WARNING)
 
     log_file: Path = Path(__file__).parent.parent.parent / 'logs' / f'app_{ENVIRONMENT}.log'
     file_handler = logging.handlers.RotatingFileHandler(
@@ -26,12 +104,11 @@ def setup_local_logging() -> None:
         maxBytes=int(25*(10**6)),
         backupCount=10,
     )
-    file_handler.setFormatter(logging.Formatter('[%(levelname)s] %(name)s %(asctime)s: %(message)s'))
-    root.addHandler(file_handler)
+    file_handler.setFormatter(file_formatter)
 
     stderr_handler = logging.StreamHandler(sys.stderr)
-    stderr_handler.setFormatter(logging.Formatter('[%(levelname)s] %(asctime)s %(name)s: %(message)s'))
-    root.addHandler(stderr_handler)
+    stderr_handler.setLevel(logging.WARNING)
+    stderr_handler.setFormatter(console_formatter)
 
     err_log_file: Path = Path(__file__).parent.parent.parent / 'logs' / f'app_{ENVIRONMENT}_error.log'
     err_file_handler = logging.handlers.RotatingFileHandler(
@@ -39,13 +116,17 @@ def setup_local_logging() -> None:
         maxBytes=int(25*(10**6)),
         backupCount=10,
     )
-    err_file_handler.setFormatter(logging.Formatter('[%(levelname)s] %(name)s %(asctime)s: %(message)s'))
-    root.addHandler(err_file_handler)
+    err_file_handler.setLevel(logging.ERROR)
+    err_file_handler.setFormatter(file_formatter)
+
+    # Log calls only enqueue the record; stream and file writes happen on the listener thread
+    _start_queue_listener(root, stdout_handler, file_handler, stderr_handler, err_file_handler)
 
 def setup_prod_logging() -> None:
     root: logging.Logger = logging.getLogger()
-    root.setLevel(logging.INFO)
+    root.setLevel(LOG_LEVEL or logging.INFO)
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
 
     stdout_handler = logging.StreamHandler(sys.stdout)
-    stdout_handler.setFormatter(logging.Formatter('{"level": [%(levelname)s], "timestamp": %(asctime)s, "name": %(name)s, "message": %(message)s'))
+    stdout_handler.setFormatter(OrjsonFormatter())
     root.addHandler(stdout_handler)
\ No newline at end of file
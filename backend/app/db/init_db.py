@@ -7,34 +7,36 @@ and perform any needed migrations.
 
 import logging
 import asyncio
-from sqlalchemy.ext.asyncio import AsyncEngine
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
 from sqlalchemy import text
-from app.core.database import engine
-from app.core.config import settings
+from app.core.database import get_engine
+from app.core.config import get_settings
 from app.models.db.base import Base
 # These imports are used by SQLAlchemy metadata even though they appear unused
 from app.models.db.bluesky import BlueskyUser, BlueskyPost, RawMessage  # noqa: F401
+from app.models.db.bluesky import POST_OPERATIONS, RAW_MESSAGE_PARTITIONS
 from app.db.migrations import run_migrations
 
 logger = logging.getLogger(__name__)
 
 
-async def enable_extensions(db_engine: AsyncEngine = engine) -> bool:
+async def _enable_extensions(conn: AsyncConnection) -> bool:
     """
-    Enable required PostgreSQL extensions before table creation.
+    Enable required PostgreSQL extensions on an open connection.
+    
+    Runs inside a savepoint so a missing privilege does not abort the
+    surrounding transaction.
     
     Args:
-        db_engine: SQLAlchemy async engine to use.
+        conn: Connection with an active transaction.
         
     Returns:
         bool: True if pg_trgm extension was successfully enabled, False otherwise
     """
-    
     logger.info("Checking PostgreSQL extensions...")
-    trgm_enabled = False
-    
-    async with db_engine.begin() as conn:
-        try:
+    try:
+        async with conn.begin_nested():
             # Enable pg_trgm extension for GIN text search index
             logger.info("Enabling pg_trgm extension if not already enabled...")
             await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
@@ -44,63 +46,254 @@ async def enable_extensions(db_engine: AsyncEngine = engine) -> bool:
                 "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
             ))
             trgm_enabled = bool(result.scalar())
-            
-            if trgm_enabled:
-                logger.info("pg_trgm extension is available")
-            else:
-                logger.warning("pg_trgm extension could not be confirmed as available")
-                
-        except Exception as e:
-            # Log warning but continue - this allows development on DBs without extension privileges
-            logger.warning(f"Could not enable pg_trgm extension: {e}")
-            logger.warning("GIN text search index will not be available")
-            trgm_enabled = False
+    except Exception as e:
+        # Log warning but continue - this allows development on DBs without extension privileges
+        logger.warning("Could not enable pg_trgm extension: %s", e)
+        logger.warning("GIN text search index will not be available")
+        return False
     
+    if trgm_enabled:
+        logger.info("pg_trgm extension is available")
+    else:
+        logger.warning("pg_trgm extension could not be confirmed as available")
     return trgm_enabled
 
 
-async def create_tables(db_engine: AsyncEngine = engine) -> None:
+async def _create_tables(conn: AsyncConnection) -> None:
     """
-    Create all database tables defined in SQLAlchemy models.
+    Create all database tables defined in SQLAlchemy models on an open connection.
     
     Args:
-        db_engine: SQLAlchemy async engine to use for creating tables.
+        conn: Connection with an active transaction.
     """
     logger.info("Creating database tables...")
-    async with db_engine.begin() as conn:
-        # Only drop tables if explicitly configured to do so
-        if settings.ENVIRONMENT == 'development' and getattr(settings, 'RESET_DB', False):
-            logger.warning("DROPPING ALL TABLES in development mode!")
-            await conn.run_sync(Base.metadata.drop_all)
-        
-        # Create all tables
-        await conn.run_sync(Base.metadata.create_all)
+    settings = get_settings()
+    # Only drop tables if explicitly configured to do so
+    if settings.ENVIRONMENT == 'development' and settings.RESET_DB:
+        logger.warning("DROPPING ALL TABLES in development mode!")
+        await conn.run_sync(Base.metadata.drop_all)
+    
+    # Create all tables
+    await conn.run_sync(Base.metadata.create_all)
     logger.info("Database tables created successfully")
 
 
-async def create_text_search_index(db_engine: AsyncEngine = engine) -> None:
+# Tables whose layout can't be changed in place are renamed out of the way before
+# create_all, which then builds them fresh; SCHEMA_MIGRATIONS copies the rows back.
+# A plain raw_message can't be turned into a partitioned table, and the type of a
+# partition key (kind, now an enum) can't be altered, so either kind of outdated
+# raw_message is set aside without its primary key and indexes, whose names the new
+# table reuses. Its partitions are renamed too, or the new table's partitions would
+# find their names taken and never be created
+PRE_CREATE_MIGRATIONS = (
     """
-    Create GIN text search index on the bluesky_post table.
-    This should only be called after tables are created and
-    if pg_trgm extension is available.
+    DO $$
+    DECLARE
+        constraint_name text;
+        index_name text;
+        partition_name text;
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM pg_class
+            WHERE oid = to_regclass('raw_message') AND relkind <> 'p'
+        ) OR EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'raw_message'
+              AND column_name = 'kind' AND udt_name <> 'raw_message_kind'
+        ) THEN
+            ALTER TABLE raw_message RENAME TO raw_message_previous;
+            FOR partition_name IN
+                SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'raw_message_previous'::regclass
+            LOOP
+                EXECUTE format('ALTER TABLE %I RENAME TO %I', partition_name, partition_name || '_previous');
+            END LOOP;
+            -- Named by the metadata naming convention (pk_raw_message), looked up to be safe
+            FOR constraint_name IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = 'raw_message_previous'::regclass AND contype = 'p'
+            LOOP
+                EXECUTE format('ALTER TABLE raw_message_previous DROP CONSTRAINT %I', constraint_name);
+            END LOOP;
+            FOR index_name IN
+                SELECT indexname FROM pg_indexes
+                WHERE schemaname = current_schema()
+                  AND tablename = 'raw_message_previous'
+            LOOP
+                EXECUTE format('DROP INDEX %I', index_name);
+            END LOOP;
+        END IF;
+    END $$
+    """,
+)
+
+# create_all only creates missing tables (and their indexes), so index and column
+# changes on existing tables are applied here as idempotent DDL
+SCHEMA_MIGRATIONS = (
+    # create_all skips an existing raw_message along with its after_create partitions,
+    # so partitions missing from it are created here before any rows are copied in
+    *RAW_MESSAGE_PARTITIONS,
+    # Rows of a raw_message set aside by PRE_CREATE_MIGRATIONS move to the new table
+    """
+    DO $$
+    BEGIN
+        IF to_regclass('raw_message_previous') IS NOT NULL THEN
+            INSERT INTO raw_message (id, did, time_us, kind, raw_data, processed, created_at, updated_at)
+            SELECT id, did, time_us, kind::text::raw_message_kind, raw_data, processed, created_at, updated_at
+            FROM raw_message_previous;
+            DROP TABLE raw_message_previous;
+        END IF;
+    END $$
+    """,
+    # bluesky_post.operation became a native enum. create_all only creates the type
+    # along with a new table, so an existing bluesky_post needs it created here, and
+    # the CHECK constraint the enum replaced is dropped before the column converts
+    f"""
+    DO $$
+    DECLARE
+        constraint_name text;
+    BEGIN
+        IF to_regtype('bsky_operation') IS NULL THEN
+            CREATE TYPE bsky_operation AS ENUM ({", ".join(f"'{op}'" for op in POST_OPERATIONS)});
+        END IF;
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'bluesky_post'
+              AND column_name = 'operation' AND udt_name <> 'bsky_operation'
+        ) THEN
+            -- The naming convention prefixes the declared name, so match on the definition
+            FOR constraint_name IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = 'bluesky_post'::regclass AND contype = 'c'
+                  AND pg_get_constraintdef(oid) LIKE '%operation%'
+            LOOP
+                EXECUTE format('ALTER TABLE bluesky_post DROP CONSTRAINT %I', constraint_name);
+            END LOOP;
+            ALTER TABLE bluesky_post
+                ALTER COLUMN operation TYPE bsky_operation USING operation::text::bsky_operation;
+        END IF;
+    END $$
+    """,
+    # ix_bluesky_post_bsky_created_at (btree) was replaced by a BRIN index
+    "CREATE INDEX IF NOT EXISTS ix_bluesky_post_bsky_created_at_brin "
+    "ON bluesky_post USING brin (bsky_created_at) WITH (pages_per_range = 32)",
+    "DROP INDEX IF EXISTS ix_bluesky_post_bsky_created_at",
+    # ix_bluesky_post_user_timeline was replaced by a covering index
+    "CREATE INDEX IF NOT EXISTS ix_bluesky_post_user_timeline_covering "
+    "ON bluesky_post (user_id, bsky_created_at) INCLUDE (uri, cid)",
+    "DROP INDEX IF EXISTS ix_bluesky_post_user_timeline",
+    # Redundant with the unique indexes on bluesky_post.uri and bluesky_user.did
+    "DROP INDEX IF EXISTS ix_bluesky_post_uri_cid",
+    "DROP INDEX IF EXISTS ix_bluesky_user_did_handle",
+    # Partial index backing RawMessageRepository.claim_batch
+    "CREATE INDEX IF NOT EXISTS ix_raw_message_unprocessed_time_us "
+    "ON raw_message (time_us) WHERE NOT processed",
+    # Relay sequence numbers outgrow a 32-bit integer. ALTER TABLE takes an ACCESS
+    # EXCLUSIVE lock even when the type already matches, blocking the running workers,
+    # so it only runs while the column is still narrower
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'bluesky_user'
+              AND column_name = 'seq' AND data_type <> 'bigint'
+        ) THEN
+            ALTER TABLE bluesky_user ALTER COLUMN seq TYPE BIGINT;
+        END IF;
+    END $$
+    """,
+)
+
+
+async def _prepare_schema(conn: AsyncConnection) -> None:
+    """
+    Set aside existing tables that create_all has to rebuild.
+    
+    Args:
+        conn: Connection with an active transaction.
+    """
+    for statement in PRE_CREATE_MIGRATIONS:
+        await conn.execute(text(statement))
+
+
+async def _migrate_schema(conn: AsyncConnection) -> None:
+    """
+    Bring indexes and columns on existing tables in line with the models.
     
     Args:
-        db_engine: SQLAlchemy async engine to use.
+        conn: Connection with an active transaction.
+    """
+    logger.info("Applying schema migrations...")
+    for statement in SCHEMA_MIGRATIONS:
+        await conn.execute(text(statement))
+    logger.info("Schema migrations applied successfully")
+
+
+async def _create_text_search_index(conn: AsyncConnection) -> None:
     """
+    Create GIN text search index on the bluesky_post table on an open connection.
+    
+    Runs inside a savepoint so a failure leaves the tables created earlier in
+    the same transaction intact.
     
+    Args:
+        conn: Connection with an active transaction.
+    """
     logger.info("Creating text search index...")
     try:
-        async with db_engine.begin() as conn:
+        async with conn.begin_nested():
             await conn.execute(text(
                 "CREATE INDEX IF NOT EXISTS ix_bluesky_post_text_search "
                 "ON bluesky_post USING gin (text gin_trgm_ops)"
             ))
-            logger.info("Text search index created successfully")
+        logger.info("Text search index created successfully")
     except Exception as e:
-        logger.warning(f"Could not create text search index: {e}")
+        logger.warning("Could not create text search index: %s", e)
         logger.warning("Text search functionality will be limited")
 
 
+async def enable_extensions(db_engine: Optional[AsyncEngine] = None) -> bool:
+    """
+    Enable required PostgreSQL extensions before table creation.
+    
+    Args:
+        db_engine: SQLAlchemy async engine to use. Defaults to the shared engine.
+        
+    Returns:
+        bool: True if pg_trgm extension was successfully enabled, False otherwise
+    """
+    db_engine = db_engine or get_engine()
+    async with db_engine.begin() as conn:
+        return await _enable_extensions(conn)
+
+
+async def create_tables(db_engine: Optional[AsyncEngine] = None) -> None:
+    """
+    Create all database tables defined in SQLAlchemy models.
+    
+    Args:
+        db_engine: SQLAlchemy async engine to use for creating tables. Defaults to the shared engine.
+    """
+    db_engine = db_engine or get_engine()
+    async with db_engine.begin() as conn:
+        await _create_tables(conn)
+
+
+async def create_text_search_index(db_engine: Optional[AsyncEngine] = None) -> None:
+    """
+    Create GIN text search index on the bluesky_post table.
+    This should only be called after tables are created and
+    if pg_trgm extension is available.
+    
+    Args:
+        db_engine: SQLAlchemy async engine to use. Defaults to the shared engine.
+    """
+    db_engine = db_engine or get_engine()
+    async with db_engine.begin() as conn:
+        await _create_text_search_index(conn)
+
+
 async def init_db() -> None:
     """
     Initialize the database with tables and initial data.
@@ -108,15 +301,19 @@ async def init_db() -> None:
     # First run migrations
     run_migrations()
     
-    # Then enable extensions
-    pg_trgm_available = await enable_extensions()
-    
-    # Create tables (will use the updated model with BigInteger)
-    await create_tables()
-    
-    # If pg_trgm is available, create the text search index
-    if pg_trgm_available:
-        await create_text_search_index()
+    # Extensions, tables and the search index share one connection and one
+    # transaction, so startup pays a single BEGIN/COMMIT round-trip
+    async with get_engine().begin() as conn:
+        pg_trgm_available = await _enable_extensions(conn)
+        
+        # Create tables (will use the updated model with BigInteger)
+        await _prepare_schema(conn)
+        await _create_tables(conn)
+        await _migrate_schema(conn)
+        
+        # If pg_trgm is available, create the text search index
+        if pg_trgm_available:
+            await _create_text_search_index(conn)
     
     logger.info("Database initialized successfully")
 
@@ -6,6 +6,7 @@ This module provides functions to run Alembic migrations as part of the applicat
 
 import os
 import logging
+from functools import lru_cache
 from pathlib import Path
 from alembic.config import Config
 from alembic import command
@@ -19,6 +20,11 @@ def get_project_root():
     # Go up two levels: from app/db/ to the project root
     return current_file.parent.parent.parent
 
+@lru_cache(maxsize=1)
+def get_alembic_config() -> Config:
+    """Load the Alembic config once per process instead of re-parsing alembic.ini on every run"""
+    return Config(str(get_project_root() / "alembic.ini"))
+
 def run_migrations():
     """Run database migrations to the latest version"""
     try:
@@ -29,11 +35,11 @@ def run_migrations():
         alembic_ini_path = project_root / "alembic.ini"
         
         if not alembic_ini_path.exists():
-            logger.error(f"Alembic configuration file not found at {alembic_ini_path}")
+            logger.error("Alembic configuration file not found at %s", alembic_ini_path)
             return False
         
-        # Create Alembic config
-        alembic_cfg = Config(str(alembic_ini_path))
+        # Reuse the cached Alembic config
+        alembic_cfg = get_alembic_config()
         
         # Apply all pending migrations
         command.upgrade(alembic_cfg, "head")
@@ -41,7 +47,7 @@ def run_migrations():
         logger.info("Database migrations completed successfully")
         return True
     except Exception as e:
-        logger.error(f"Error running database migrations: {e}")
+        logger.error("Error running database migrations: %s", e)
         return False
 
 if __name__ == "__main__":
@@ -5,16 +5,15 @@ import logging
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 
-from tests import test_jetstream_db
-from app.core.logging import setup_local_logging, setup_prod_logging
-from app.core.config import settings
+from app.core.logging import setup_local_logging, setup_prod_logging, stop_logging
+from app.core.config import get_settings
 from app.core.database import get_db
-from app.db.init_db import init_db
-from app.services.db_test import test_database_connection
-from app.workers.persistence import PersistenceWorker, start_persistence_worker
-from app.workers.kafka_ingest import start_ingest_client
+from app.models.api_types import PostResponse, UserResponse
+from app.models.db.bluesky import BlueskyPost, BlueskyUser
 
 ENVIRONMENT: str = os.getenv('ENVIRONMENT', 'development')
 if ENVIRONMENT == 'development':
@@ -29,6 +28,11 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Lifespan context manager for FastAPI application"""
     global persistence_worker, ingest_client
+    # Startup-only dependencies are imported here so workers don't pay for them at module import
+    from app.db.init_db import init_db
+    from app.services.db_test import test_database_connection
+    from app.workers.persistence import start_persistence_worker
+    from app.workers.kafka_ingest import start_ingest_client
     
     logger.info("Testing database connection on startup...")
     db_ok: bool = await test_database_connection()
@@ -40,19 +44,19 @@ async def lifespan(app: FastAPI):
             await init_db()
             logger.info("Database initialized successfully")
         except Exception as e:
-            logger.error(f"Database initialization error: {e}")
+            logger.error("Database initialization error: %s", e)
     
     try:
         persistence_worker = await start_persistence_worker()
         logger.info("Persistence worker started successfully")
     except Exception as e:
-        logger.error(f"Error starting persistence worker: {e}")
+        logger.error("Error starting persistence worker: %s", e)
     
     try:
         ingest_client = await start_ingest_client()
         logger.info("Ingest client started successfully")
     except Exception as e:
-        logger.error(f"Error starting ingest client: {e}")
+        logger.error("Error starting ingest client: %s", e)
     
     # Yield control back to FastAPI
     yield
@@ -68,6 +72,11 @@ async def lifespan(app: FastAPI):
         await ingest_client.stop()
         logger.info("Ingest client stopped")
 
+    # Drain any queued log records before the process exits
+    stop_logging()
+
+settings = get_settings()
+
 # Create the FastAPI app with lifespan
 app = FastAPI(
     title=settings.PROJECT_NAME, 
@@ -106,10 +115,12 @@ async def get_jetstream():
     """
     Shortcut endpoint for initializing jetstream
     """
+    from tests import test_jetstream_db
+
     try:
         await test_jetstream_db.main()
-    except:
-        print('Error in jetstream test')
+    except Exception:
+        logger.exception("Error in jetstream test")
     
     return {"status": "jetstream connection initiated"}
 
@@ -118,15 +129,14 @@ async def db_test():
     """
     Test database connection and return status.
     """
+    from app.services.db_test import test_database_connection
+
     db_ok = await test_database_connection()
     return {"status": "ok" if db_ok else "error", "message": "Database connection successful" if db_ok else "Database connection failed"}
 
 
 # API endpoints for accessing the database
-from sqlalchemy.future import select
-from app.models.db.bluesky import BlueskyPost, BlueskyUser
-
-@app.get("/api/v1/posts")
+@app.get("/api/v1/posts", response_model=List[PostResponse])
 async def get_posts(
     limit: int = 10, 
     offset: int = 0,
@@ -137,18 +147,11 @@ async def get_posts(
     """
     query = select(BlueskyPost).order_by(BlueskyPost.bsky_created_at.desc()).limit(limit).offset(offset)
     result = await db.execute(query)
-    posts = result.scalars().all()
-    
-    return [{
-        "id": post.id,
-        "uri": post.uri,
-        "text": post.text,
-        "created_at": post.bsky_created_at,
-        "user_id": post.user_id,
-    } for post in posts]
+    # Serialized through PostResponse directly from the ORM rows
+    return result.scalars().all()
 
 
-@app.get("/api/v1/users")
+@app.get("/api/v1/users", response_model=List[UserResponse])
 async def get_users(
     limit: int = 10, 
     offset: int = 0,
@@ -159,11 +162,5 @@ async def get_users(
     """
     query = select(BlueskyUser).limit(limit).offset(offset)
     result = await db.execute(query)
-    users = result.scalars().all()
-    
-    return [{
-        "id": user.id,
-        "did": user.did,
-        "handle": user.handle,
-        "active": user.active,
-    } for user in users]
\ No newline at end of file
+    # Serialized through UserResponse directly from the ORM rows
+    return result.scalars().all()
\ No newline at end of file
@@ -0,0 +1,25 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+class ApiBase(BaseModel):
+    """
+    Base class for REST API response models.
+    Built from ORM objects so FastAPI can serialize rows straight to JSON
+    through pydantic-core without an intermediate dict.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+class PostResponse(ApiBase):
+    id: uuid.UUID
+    uri: str
+    text: Optional[str] = None
+    created_at: datetime = Field(validation_alias="bsky_created_at")
+    user_id: uuid.UUID
+
+class UserResponse(ApiBase):
+    id: uuid.UUID
+    did: str
+    handle: str
+    active: Optional[bool] = None
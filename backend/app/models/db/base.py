@@ -1,7 +1,24 @@
 import datetime
+import os
+import time
+import uuid
 from sqlalchemy import Column, DateTime, func
 from sqlalchemy.orm import mapped_column, Mapped
-from app.core.database import Base
+from app.core.db_base import Base
+
+def _uuid7() -> uuid.UUID:
+    """Build an RFC 9562 UUIDv7: 48-bit unix milliseconds followed by random bits."""
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10)) & ((1 << 80) - 1)
+    # Set the version (7) and the RFC variant bits
+    value = value & ~(0xF << 76) | (0x7 << 76)
+    value = value & ~(0x3 << 62) | (0x2 << 62)
+    return uuid.UUID(int=value)
+
+
+# Time-ordered primary keys append to the right edge of the btree instead of
+# touching a random leaf page per insert. Python 3.14+ ships uuid.uuid7.
+uuid7 = getattr(uuid, "uuid7", _uuid7)
+
 
 class TimestampMixin:
     """Mixin that adds created_at and updated_at timestamps to models."""
@@ -1,13 +1,20 @@
 import datetime
 from typing import Any, Dict, List, Optional, Sequence
-import uuid
 
-from sqlalchemy import String, Integer, Boolean, DateTime, Text, ForeignKey, Index, CheckConstraint, BigInteger, Uuid
+from sqlalchemy import DDL, Enum, event, text, String, Boolean, DateTime, Text, ForeignKey, Index, BigInteger, Uuid
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 from sqlalchemy.types import TypeDecorator, CHAR
 
-from app.models.db.base import DBBase, TimestampMixin
+from app.models.db.base import DBBase, TimestampMixin, uuid7
+
+POST_OPERATIONS = ("create", "update", "delete")
+RAW_MESSAGE_KINDS = ("commit", "identity", "account")
+
+# Native PostgreSQL enums store a 4-byte value per row and enforce the allowed values
+# without a per-row CHECK expression
+PostOperation = Enum(*POST_OPERATIONS, name="bsky_operation")
+RawMessageKind = Enum(*RAW_MESSAGE_KINDS, name="raw_message_kind")
 
 
 class BlueskyUser(DBBase, TimestampMixin):
@@ -20,7 +27,7 @@ class BlueskyUser(DBBase, TimestampMixin):
     __tablename__ = "bluesky_user"
     
     # Primary key and unique identifiers
-    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=uuid.uuid4)
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=uuid7)
     did: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
     handle: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     
@@ -28,17 +35,11 @@ class BlueskyUser(DBBase, TimestampMixin):
     active: Mapped[bool] = mapped_column(Boolean, default=True)
     
     # Sequence number and timestamp from Bluesky
-    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
     bsky_timestamp: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
     
     # Relationships
     posts: Mapped[List['BlueskyPost']] = relationship("BlueskyPost", back_populates="user", cascade="all, delete-orphan")
-    
-    # Indexes
-    __table_args__ = (
-        # Main lookup index for finding users by ID or handle
-        Index("ix_bluesky_user_did_handle", "did", "handle"),
-    )
 
 
 class BlueskyPost(DBBase, TimestampMixin):
@@ -51,7 +52,7 @@ class BlueskyPost(DBBase, TimestampMixin):
     __tablename__ = "bluesky_post"
     
     # Primary key and unique identifiers
-    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=uuid.uuid4)
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=uuid7)
     cid: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     uri: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
     
@@ -65,7 +66,7 @@ class BlueskyPost(DBBase, TimestampMixin):
     rev: Mapped[str] = mapped_column(String(255))
     rkey: Mapped[str] = mapped_column(String(255), nullable=False)
     collection: Mapped[str] = mapped_column(String(255), nullable=False)
-    operation: Mapped[str] = mapped_column(String(50), nullable=False)  # create, update, delete
+    operation: Mapped[str] = mapped_column(PostOperation, nullable=False)
     
     # Foreign keys
     user_id: Mapped[str] = mapped_column(UUID, ForeignKey("bluesky_user.id"), nullable=False)
@@ -77,22 +78,31 @@ class BlueskyPost(DBBase, TimestampMixin):
     root_cid: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
     root_uri: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
     
-    # Additional data as JSON (extensible)
-    additional_data: Mapped[Optional[Dict[str,Any]]] = mapped_column(JSONB, nullable=True)
+    # Additional data as JSON (extensible); deferred so listing queries skip the blob
+    additional_data: Mapped[Optional[Dict[str,Any]]] = mapped_column(JSONB, nullable=True, deferred=True)
     
     __table_args__ = (
-        Index("ix_bluesky_post_uri_cid", "uri", "cid"),
-        Index("ix_bluesky_post_bsky_created_at", "bsky_created_at"),
-        Index("ix_bluesky_post_user_timeline", "user_id", "bsky_created_at"),
+        # Posts arrive roughly in created_at order, so a BRIN summary per block range
+        # serves time-range scans at a fraction of a btree's size and insert cost
+        Index(
+            "ix_bluesky_post_bsky_created_at_brin",
+            "bsky_created_at",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ),
+        # Covering timeline index: uri/cid are served from the index without heap fetches
+        Index(
+            "ix_bluesky_post_user_timeline_covering",
+            "user_id",
+            "bsky_created_at",
+            postgresql_include=["uri", "cid"],
+        ),
         Index("ix_bluesky_post_reply_tree", "parent_uri", "root_uri"),
         # Search indexes
         Index("ix_bluesky_post_text_search", "text", postgresql_using='gin', postgresql_ops={'text': 'gin_trgm_ops'}),
         
         # Operation filtering
         Index("ix_bluesky_post_operation_type", "operation", "record_type"),
-        
-        # Data validation
-        CheckConstraint("operation IN ('create', 'update', 'delete')", name="ck_bluesky_post_valid_operation")
     )
 
 
@@ -103,16 +113,16 @@ class RawMessage(DBBase, TimestampMixin):
     
     __tablename__ = "raw_message"
     
-    # Primary key
-    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=uuid.uuid4)
+    # Primary key; PostgreSQL requires the partition key (kind) to be part of it
+    id: Mapped[str] = mapped_column(UUID, primary_key=True, default=uuid7)
     
     # Message metadata
     did: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     time_us: Mapped[int] = mapped_column(BigInteger, nullable=False)
-    kind: Mapped[str] = mapped_column(String(50), nullable=False, index=True)  # commit, identity, account
+    kind: Mapped[str] = mapped_column(RawMessageKind, primary_key=True, index=True)
     
-    # Raw message content
-    raw_data: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    # Raw message content; deferred so status queries skip the payload
+    raw_data: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False, deferred=True)
     
     # Processing status
     processed: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
@@ -122,6 +132,21 @@ class RawMessage(DBBase, TimestampMixin):
         # Filter by message kind and processing status
         Index("ix_raw_message_kind_processed", "kind", "processed"),
         
-        # Ensure valid message kinds
-        CheckConstraint("kind IN ('commit', 'identity', 'account')", name="ck_raw_message_valid_kind")
+        # Only the unprocessed tail is indexed, so claiming the oldest rows stays
+        # O(batch) no matter how much history has accumulated
+        Index("ix_raw_message_unprocessed_time_us", "time_us", postgresql_where=text("NOT processed")),
+        
+        # One partition per message kind keeps per-kind scans, indexes and vacuum small
+        {"postgresql_partition_by": "LIST (kind)"},
     )
+
+
+# One partition per kind. create_all only creates the partitioned parent, so they are
+# attached right after it; init_db also runs them on every startup to fill in any missing
+RAW_MESSAGE_PARTITIONS = tuple(
+    f"CREATE TABLE IF NOT EXISTS raw_message_{kind} PARTITION OF raw_message FOR VALUES IN ('{kind}')"
+    for kind in RAW_MESSAGE_KINDS
+)
+for _partition in RAW_MESSAGE_PARTITIONS:
+    event.listen(RawMessage.__table__, "after_create", DDL(_partition))
+del _partition
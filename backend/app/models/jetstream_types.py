@@ -1,6 +1,7 @@
+import sys
 from datetime import datetime
-from typing import Optional, Literal, List, Union, Dict, Any
-from pydantic import BaseModel, Field, field_validator
+from typing import Optional, Literal, List, Dict, Any, NamedTuple
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
 
 class JetstreamBase(BaseModel):
     """
@@ -9,10 +10,11 @@ class JetstreamBase(BaseModel):
     models should share.
     """
     # Pydantic v2 configuration for model validation
-    model_config = {
-        "extra": "allow",         # Allow extra fields for forward compatibility
-        "populate_by_name": True  # Allow both alias and original field names
-    }
+    model_config = ConfigDict(
+        extra="allow",          # Allow extra fields for forward compatibility
+        populate_by_name=True,  # Allow both alias and original field names
+        defer_build=False       # Build validators at import time, not on the first message
+    )
 
 class Subject(JetstreamBase):
     cid: str = ""
@@ -25,18 +27,18 @@ class Reply(JetstreamBase):
 class Record(JetstreamBase):
     record_type: str = Field(alias="$type")
     createdAt: datetime
-    subject: Optional[Union[Subject, str]] = Field(default=None)
+    subject: Optional[Subject] = Field(default=None)
     text: Optional[str] = Field(default=None)
     langs: Optional[List[str]] = Field(default=None)
     reply: Optional[Reply] = Field(default=None)
     
-    @field_validator('subject')
+    @field_validator('subject', mode='before')
     @classmethod
     def validate_subject(cls, v):
-        """Handle string subjects by converting them to Subject objects"""
+        """Normalize string subjects before validation so each message is validated once"""
         if isinstance(v, str):
-            # If subject is a string (like a DID), create a Subject with the string as URI
-            return Subject(uri=v)
+            # If subject is a string (like a DID), treat the string as the Subject URI
+            return {"uri": v, "cid": ""}
         return v
 
 class Commit(JetstreamBase):
@@ -45,6 +47,12 @@ class Commit(JetstreamBase):
     collection: str
     rkey: str
     record: Optional[Record] = None
+    
+    @field_validator('collection')
+    @classmethod
+    def intern_collection(cls, v: str) -> str:
+        """Share one string per collection NSID instead of a copy per message"""
+        return sys.intern(v)
 
 class Identity(JetstreamBase):
     did: str
@@ -65,37 +73,21 @@ class Message(JetstreamBase):
     commit: Optional[Commit] = None
     identity: Optional[Identity] = None
     account: Optional[Account] = None
-    
-    @classmethod
-    def model_validate(cls, obj, *args, **kwargs):
-        """Handle edge cases during validation"""
-        try:
-            # First try standard validation
-            return super().model_validate(obj, *args, **kwargs)
-        except Exception as e:
-            # If that fails, attempt to preprocess the object
-            if isinstance(obj, dict):
-                try:
-                    # Make a copy to avoid modifying the original
-                    processed_obj = obj.copy()
-                    
-                    # Fix common validation issues
-                    if "commit" in processed_obj and isinstance(processed_obj["commit"], dict):
-                        commit = processed_obj["commit"]
-                        
-                        # Handle string subjects in records
-                        if "record" in commit and isinstance(commit["record"], dict):
-                            record = commit["record"]
-                            
-                            if "subject" in record and isinstance(record["subject"], str):
-                                # Convert string subject to a Subject object
-                                record["subject"] = {"uri": record["subject"], "cid": ""}
-                    
-                    # Try validation again with the processed object
-                    return super().model_validate(processed_obj, *args, **kwargs)
-                except Exception:
-                    # If preprocessing fails, just pass through the original error
-                    pass
-            
-            # Re-raise the original error if preprocessing didn't help
-            raise e
\ No newline at end of file
+
+
+# Built once and shared by every consumer that validates raw Jetstream messages
+MESSAGE_ADAPTER: TypeAdapter[Message] = TypeAdapter(Message)
+
+
+class FastMessage(NamedTuple):
+    """
+    Envelope fields of a Jetstream message parsed without validation.
+    The full message is kept in raw, as the JSON bytes received, for
+    consumers that forward it without re-encoding.
+    """
+    did: str
+    time_us: int
+    kind: str
+    collection: Optional[str]
+    rkey: Optional[str]
+    raw: bytes
@@ -1,12 +1,53 @@
+from functools import lru_cache
 from typing import Generic, TypeVar, Type, List, Optional, Any, Dict, Union, Sequence, cast, overload
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, insert, update, delete, func, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.sql import Select
 
 # Define a type variable for any class that can serve as a model
 # We don't use DBBase here since it causes type conflicts with actual columns
 ModelType = TypeVar("ModelType")
 
+# Rows per multi-row INSERT statement sent by bulk operations
+BULK_CHUNK_SIZE = 1000
+
+
+# Statements are cached per model (and per column set) at module level because
+# repositories are created per message. Values are passed as bound parameters, so
+# each call only executes the prebuilt statement.
+@lru_cache(maxsize=None)
+def _get_stmt(model: Any) -> Select:
+    return select(model).where(getattr(model, "id") == bindparam("pk"))
+
+
+@lru_cache(maxsize=256)
+def _get_by_stmt(model: Any, keys: tuple[str, ...]) -> Select:
+    return select(model).where(*(getattr(model, key) == bindparam(f"p_{key}") for key in keys))
+
+
+@lru_cache(maxsize=256)
+def _update_stmt(model: Any, keys: tuple[str, ...]) -> Any:
+    return (
+        update(model)
+        .where(getattr(model, "id") == bindparam("pk"))
+        .values({getattr(model, key): bindparam(f"v_{key}") for key in keys})
+        .returning(model)
+        # The session can't evaluate bound parameters against loaded objects, so refresh
+        # them from the RETURNING row instead
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+
+
+@lru_cache(maxsize=None)
+def _delete_stmt(model: Any) -> Any:
+    # "fetch" drops deleted objects from the session using the RETURNING primary keys
+    return (
+        delete(model)
+        .where(getattr(model, "id") == bindparam("pk"))
+        .execution_options(synchronize_session="fetch")
+    )
+
 
 class BaseRepository(Generic[ModelType]):
     """
@@ -34,11 +75,11 @@ class BaseRepository(Generic[ModelType]):
         Returns:
             The created model instance.
         """
-        db_obj = self.model(**obj_in)
-        self.session.add(db_obj)
-        await self.session.flush()
-        await self.session.refresh(db_obj)
-        return db_obj
+        # INSERT ... RETURNING hands back server defaults in the same round-trip,
+        # where add + flush + refresh needed a second SELECT
+        stmt = insert(self.model).values(**obj_in).returning(self.model)
+        result = await self.session.execute(stmt)
+        return result.scalars().one()
         
     async def get_or_create(self, defaults: Dict[str, Any] | None = None, **kwargs) -> tuple[ModelType, bool]:
         """
@@ -62,7 +103,10 @@ class BaseRepository(Generic[ModelType]):
         
     async def bulk_upsert(self, objects: List[Dict[str, Any]], key_fields: List[str]) -> List[ModelType]:
         """
-        Upsert multiple objects efficiently.
+        Upsert multiple objects with batched INSERT ... ON CONFLICT DO UPDATE statements.
+        
+        The key fields must be covered by a unique constraint or index. Rows missing any
+        key field are skipped; when several rows share a key, the last one wins.
         
         Args:
             objects: List of dictionaries with object data
@@ -71,32 +115,39 @@ class BaseRepository(Generic[ModelType]):
         Returns:
             List of updated or created objects
         """
-        results: List[ModelType] = []
-        
+        # Deduplicate by key: PostgreSQL rejects a statement that updates the same row twice
+        rows: Dict[tuple, Dict[str, Any]] = {}
         for obj_data in objects:
-            # Extract key fields for lookup
-            lookup = {field: obj_data[field] for field in key_fields if field in obj_data}
-            
-            # Skip if we don't have complete keys
-            if len(lookup) != len(key_fields):
-                continue
-                
-            # Try to get existing record
-            instance = await self.get_by(**lookup)
-            
-            if instance:
-                # Update existing - we access id attribute with getattr to avoid type issues
-                instance_id = getattr(instance, "id")
-                updated = await self.update(
-                    instance_id, 
-                    obj_data
+            if all(field in obj_data for field in key_fields):
+                rows[tuple(obj_data[field] for field in key_fields)] = obj_data
+        
+        # A multi-row VALUES clause needs the same columns in every row, so group by column set
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for obj_data in rows.values():
+            groups.setdefault(frozenset(obj_data), []).append(obj_data)
+        
+        table = getattr(self.model, "__table__")
+        results: List[ModelType] = []
+        for columns, group in groups.items():
+            for start in range(0, len(group), BULK_CHUNK_SIZE):
+                stmt = pg_insert(self.model).values(group[start:start + BULK_CHUNK_SIZE])
+                # Only overwrite the columns the caller provided
+                update_cols: Dict[str, Any] = {
+                    name: stmt.excluded[name]
+                    for name in columns
+                    if name not in key_fields and name != "id"
+                }
+                # onupdate defaults are not applied to ON CONFLICT updates
+                if "updated_at" in table.c:
+                    update_cols["updated_at"] = func.now()
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=key_fields,
+                    set_=update_cols,
+                ).returning(self.model)
+                result = await self.session.execute(
+                    stmt, execution_options={"populate_existing": True}
                 )
-                if updated:
-                    results.append(updated)
-            else:
-                # Create new
-                created = await self.create(obj_data)
-                results.append(created)
+                results.extend(result.scalars().all())
                 
         return results
     
@@ -110,10 +161,13 @@ class BaseRepository(Generic[ModelType]):
         Returns:
             List of created model instances.
         """
-        db_objs = [self.model(**obj_in) for obj_in in objs_in]
-        self.session.add_all(db_objs)
-        await self.session.flush()
-        return db_objs
+        if not objs_in:
+            return []
+        # ORM bulk INSERT skips per-object unit-of-work bookkeeping and is sent as
+        # multi-row VALUES pages of insertmanyvalues_page_size rows
+        stmt = insert(self.model).returning(self.model)
+        result = await self.session.execute(stmt, objs_in)
+        return list(result.scalars().all())
     
     async def get(self, id: Any) -> Optional[ModelType]:
         """
@@ -125,9 +179,7 @@ class BaseRepository(Generic[ModelType]):
         Returns:
             The model instance if found, None otherwise.
         """
-        # Use dynamic attribute access for id to avoid type issues
-        query = select(self.model).where(getattr(self.model, "id") == id)
-        result = await self.session.execute(query)
+        result = await self.session.execute(_get_stmt(self.model), {"pk": id})
         return result.scalars().first()
     
     async def get_by(self, **kwargs) -> Optional[ModelType]:
@@ -140,11 +192,11 @@ class BaseRepository(Generic[ModelType]):
         Returns:
             The model instance if found, None otherwise.
         """
-        query = select(self.model)
-        for key, value in kwargs.items():
-            query = query.where(getattr(self.model, key) == value)
-            
-        result = await self.session.execute(query)
+        keys = tuple(sorted(kwargs))
+        result = await self.session.execute(
+            _get_by_stmt(self.model, keys),
+            {f"p_{key}": kwargs[key] for key in keys},
+        )
         return result.scalars().first()
     
     async def get_all(self, limit: int = 100, offset: int = 0) -> Sequence[ModelType]:
@@ -173,13 +225,10 @@ class BaseRepository(Generic[ModelType]):
         Returns:
             The updated model instance if found, None otherwise.
         """
-        stmt = (
-            update(self.model)
-            .where(getattr(self.model, "id") == id)
-            .values(**obj_in)
-            .returning(self.model)
-        )
-        result = await self.session.execute(stmt)
+        keys = tuple(sorted(obj_in))
+        params: Dict[str, Any] = {f"v_{key}": obj_in[key] for key in keys}
+        params["pk"] = id
+        result = await self.session.execute(_update_stmt(self.model, keys), params)
         return result.scalars().first()
     
     async def delete(self, id: Any) -> bool:
@@ -192,6 +241,5 @@ class BaseRepository(Generic[ModelType]):
         Returns:
             True if the record was deleted, False otherwise.
         """
-        stmt = delete(self.model).where(getattr(self.model, "id") == id)
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(_delete_stmt(self.model), {"pk": id})
         return result.rowcount > 0
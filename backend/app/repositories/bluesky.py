@@ -7,18 +7,28 @@ including users, posts and raw messages.
 
 import logging
 import json
-from datetime import datetime
-from typing import Optional, List, Dict, Any, Tuple, Sequence, cast, Union, TypeVar
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional, List, Dict, Any, NamedTuple, Tuple, Sequence, cast, Union, TypeVar
+import orjson
+from cachetools import TTLCache
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, and_
+from sqlalchemy import Boolean, func, and_, delete, insert, literal_column, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import undefer
 
+from app.models.db.base import uuid7
 from app.models.db.bluesky import BlueskyUser, BlueskyPost, RawMessage
 from app.models.jetstream_types import Message, Commit, Identity, Account
-from app.repositories.base import BaseRepository
+from app.repositories.base import BULK_CHUNK_SIZE, BaseRepository
 
 logger = logging.getLogger(__name__)
 
+# True in an upsert's RETURNING for rows it inserted: a freshly inserted row version
+# has no deleting transaction, while ON CONFLICT DO UPDATE sets xmax to the updater
+_WAS_INSERTED = literal_column("xmax = 0", Boolean).label("was_inserted")
+
 T = TypeVar('T')
 
 def ensure_not_none(value: Optional[T], default: T) -> T:
@@ -26,6 +36,17 @@ def ensure_not_none(value: Optional[T], default: T) -> T:
     return value if value is not None else default
 
 
+class UserRef(NamedTuple):
+    """The identifying columns of a BlueskyUser, enough to attach posts to it."""
+    id: uuid.UUID
+    did: str
+
+
+# DID -> user reference for committed users. A user's id never changes once created, so
+# post ingest can skip the lookup entirely; the TTL bounds how long a removed user lingers.
+_user_cache: TTLCache = TTLCache(maxsize=100_000, ttl=600)
+
+
 class BlueskyUserRepository(BaseRepository[BlueskyUser]):
     """Repository for BlueskyUser model operations."""
     
@@ -36,10 +57,177 @@ class BlueskyUserRepository(BaseRepository[BlueskyUser]):
         """Get a user by their DID."""
         return await self.get_by(did=did)
     
+    async def resolve_dids(self, dids: Sequence[str]) -> Dict[str, UserRef]:
+        """
+        Look up many users by DID, serving repeat DIDs from an in-process cache.
+        
+        Cache misses are resolved with a single query. Only rows read back from the
+        database are cached, so users from uncommitted transactions never are.
+        
+        Args:
+            dids: DIDs to resolve. Duplicates are ignored.
+            
+        Returns:
+            Mapping of DID to UserRef for every DID that exists.
+        """
+        resolved: Dict[str, UserRef] = {}
+        missing: List[str] = []
+        for did in set(dids):
+            ref = _user_cache.get(did)
+            if ref is not None:
+                resolved[did] = ref
+            else:
+                missing.append(did)
+        
+        if missing:
+            result = await self.session.execute(
+                select(BlueskyUser.id, BlueskyUser.did).where(BlueskyUser.did.in_(missing))
+            )
+            for row in result:
+                ref = UserRef(row.id, row.did)
+                _user_cache[ref.did] = ref
+                resolved[ref.did] = ref
+        return resolved
+    
+    async def create_placeholders(self, dids: Sequence[str]) -> Dict[str, UserRef]:
+        """
+        Create placeholder users for DIDs that have no user yet.
+        
+        Commit authors are often seen before their Identity message; the placeholder
+        is replaced with proper user data when one arrives. Each chunk is a single
+        INSERT ... ON CONFLICT DO NOTHING, and DIDs another writer created first are
+        read back with one more query.
+        
+        Args:
+            dids: DIDs to create users for. Duplicates are ignored.
+            
+        Returns:
+            Mapping of DID to UserRef for every given DID.
+        """
+        unique = list(set(dids))
+        now = datetime.now(timezone.utc)
+        resolved: Dict[str, UserRef] = {}
+        for start in range(0, len(unique), BULK_CHUNK_SIZE):
+            rows: List[Dict[str, Any]] = [
+                {
+                    "did": did,
+                    "handle": f"unknown-{did[-8:]}",  # Temporary handle
+                    "seq": 0,
+                    "bsky_timestamp": now,
+                    "active": True
+                }
+                for did in unique[start:start + BULK_CHUNK_SIZE]
+            ]
+            stmt = (
+                pg_insert(BlueskyUser)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["did"])
+                .returning(BlueskyUser.id, BlueskyUser.did)
+            )
+            for row in await self.session.execute(stmt):
+                resolved[row.did] = UserRef(row.id, row.did)
+        
+        logger.debug("Created %d placeholder users", len(resolved))
+        
+        # Created concurrently by someone else; the rows exist but weren't returned
+        existing = [did for did in unique if did not in resolved]
+        if existing:
+            resolved.update(await self.resolve_dids(existing))
+        return resolved
+    
     async def get_by_handle(self, handle: str) -> Optional[BlueskyUser]:
         """Get a user by their handle."""
         return await self.get_by(handle=handle)
     
+    async def _upsert_newer(
+        self, rows: List[Dict[str, Any]], update_fields: Sequence[str]
+    ) -> List[Tuple[BlueskyUser, bool]]:
+        """
+        Insert users, or update existing ones when the incoming seq is newer.
+        
+        The seq comparison runs in SQL as the ON CONFLICT ... WHERE clause, so each
+        chunk costs one round-trip regardless of how many users already exist.
+        
+        Args:
+            rows: User rows with identical keys, including did and seq.
+            update_fields: Columns to overwrite on existing users.
+            
+        Returns:
+            (user, was_inserted) pairs for users that were created or updated;
+            users skipped as stale are omitted.
+        """
+        # Keep the newest row per DID: one statement can't update the same row twice
+        newest: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            current = newest.get(row["did"])
+            if current is None or row["seq"] > current["seq"]:
+                newest[row["did"]] = row
+        
+        deduped = list(newest.values())
+        results: List[Tuple[BlueskyUser, bool]] = []
+        for start in range(0, len(deduped), BULK_CHUNK_SIZE):
+            stmt = pg_insert(BlueskyUser).values(deduped[start:start + BULK_CHUNK_SIZE])
+            set_: Dict[str, Any] = {field: stmt.excluded[field] for field in update_fields}
+            set_["updated_at"] = func.now()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["did"],
+                set_=set_,
+                where=BlueskyUser.seq < stmt.excluded.seq,
+            ).returning(BlueskyUser, _WAS_INSERTED)
+            result = await self.session.execute(stmt, execution_options={"populate_existing": True})
+            results.extend(result.tuples().all())
+        return results
+    
+    async def upsert_many_identities(self, identities: Sequence[Identity]) -> List[Tuple[BlueskyUser, bool]]:
+        """
+        Create or update users from a batch of Identity messages.
+        
+        Args:
+            identities: Bluesky Identity objects from Jetstream.
+            
+        Returns:
+            (user, was_inserted) pairs for users that were created or updated.
+            Identities whose seq is not newer than the stored one are skipped.
+        """
+        rows: List[Dict[str, Any]] = [
+            {
+                "did": identity.did,
+                "handle": identity.handle,
+                "seq": identity.seq,
+                "bsky_timestamp": identity.time,
+                "active": True
+            }
+            for identity in identities
+        ]
+        return await self._upsert_newer(rows, ("handle", "seq", "bsky_timestamp", "active"))
+    
+    async def update_many_accounts(self, accounts: Sequence[Account]) -> List[Tuple[BlueskyUser, bool]]:
+        """
+        Update users' active status from a batch of Account messages.
+        
+        Unknown DIDs get a placeholder user, which is replaced with proper user
+        data when an Identity message arrives.
+        
+        Args:
+            accounts: Bluesky Account objects from Jetstream.
+            
+        Returns:
+            (user, was_inserted) pairs for users that were created or updated.
+            Accounts whose seq is not newer than the stored one are skipped.
+        """
+        rows: List[Dict[str, Any]] = [
+            {
+                "did": account.did,
+                "handle": f"user_{account.did[-8:]}",  # Create a temporary handle based on DID
+                "seq": account.seq,
+                "bsky_timestamp": account.time,
+                "active": account.active
+            }
+            for account in accounts
+        ]
+        # The placeholder handle is only used for new users; existing handles are kept
+        return await self._upsert_newer(rows, ("active", "seq", "bsky_timestamp"))
+    
     async def upsert_from_identity(self, identity: Identity) -> BlueskyUser:
         """
         Create or update a user from an Identity message.
@@ -50,42 +238,14 @@ class BlueskyUserRepository(BaseRepository[BlueskyUser]):
         Returns:
             The created or updated BlueskyUser instance.
         """
-        user_data: Dict[str, Any] = {
-            "did": identity.did,
-            "handle": identity.handle,
-            "seq": identity.seq,
-            "bsky_timestamp": identity.time,
-            "active": True
-        }
+        users = await self.upsert_many_identities([identity])
+        if users:
+            logger.debug("Upserted user: %s (DID: %s) with seq %s", identity.handle, identity.did, identity.seq)
+            return users[0][0]
         
-        existing_user = await self.get_by_did(identity.did)
-        
-        if existing_user is not None:
-            # Only update if the new sequence number is higher
-            if existing_user.seq is not None:
-                try:
-                    current_seq_int = int(str(existing_user.seq))
-                    new_seq_int = int(str(identity.seq))
-                    
-                    if current_seq_int >= new_seq_int:
-                        logger.debug(f"Skipping update for user {identity.handle} - seq {current_seq_int} >= {new_seq_int}")
-                        return existing_user
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Could not compare sequence numbers: {e}, proceeding with update")
-            
-            # Proceed with update
-            updated_user = await self.update(
-                existing_user.id, 
-                user_data
-            )
-            logger.info(f"Updated user: {identity.handle} (DID: {identity.did}) with seq {identity.seq}")
-            # Return the existing user if update failed
-            return ensure_not_none(updated_user, existing_user)
-        else:
-            # Create new user
-            new_user = await self.create(user_data)
-            logger.info(f"Created new user: {identity.handle} (DID: {identity.did})")
-            return new_user
+        # The stored seq is at least as new; return the current row unchanged
+        logger.debug("Skipping update for user %s - seq %s is not newer", identity.handle, identity.seq)
+        return cast(BlueskyUser, await self.get_by_did(identity.did))
     
     async def update_from_account(self, account: Account) -> BlueskyUser:
         """
@@ -95,51 +255,29 @@ class BlueskyUserRepository(BaseRepository[BlueskyUser]):
             account: Bluesky Account object from Firehose.
             
         Returns:
-            The updated BlueskyUser instance or None if not found.
-        """
-        existing_user = await self.get_by_did(account.did)
-        
-        # Only update if the user exists and the new sequence number is higher
-        if existing_user is not None:
-            # Try to compare sequence numbers
-            if existing_user.seq is not None:
-                try:
-                    current_seq_int = int(str(existing_user.seq))
-                    new_seq_int = int(str(account.seq))
-                    
-                    if current_seq_int >= new_seq_int:
-                        logger.debug(f"Skipping account update for {existing_user.handle} - seq {current_seq_int} >= {new_seq_int}")
-                        return existing_user
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Could not compare sequence numbers: {e}, proceeding with update")
-            
-            # Proceed with update since sequence comparison shows newer data or couldn't be performed
-            update_data: Dict[str, Any] = {
-                "active": account.active,
-                "seq": account.seq,
-                "bsky_timestamp": account.time
-            }
-            
-            updated_user = await self.update(
-                existing_user.id,
-                update_data
-            )
-            # Return the existing user if update failed
-            return ensure_not_none(updated_user, existing_user)
-        
-        # If we don't find a user, create a minimal placeholder
-        # This should be replaced with proper user data when we get an Identity message
-        user_data: Dict[str, Any] = {
-            "did": account.did,
-            "handle": f"user_{account.did[-8:]}",  # Create a temporary handle based on DID
-            "seq": account.seq,
-            "bsky_timestamp": account.time,
-            "active": account.active
-        }
+            The created or updated BlueskyUser instance.
+        """
+        users = await self.update_many_accounts([account])
+        if users:
+            return users[0][0]
         
-        new_user = await self.create(user_data)
-        logger.info(f"Created placeholder user for DID: {account.did}")
-        return new_user
+        # The stored seq is at least as new; return the current row unchanged
+        logger.debug("Skipping account update for %s - seq %s is not newer", account.did, account.seq)
+        return cast(BlueskyUser, await self.get_by_did(account.did))
+
+
+# Rows fetched per round-trip by the streaming post queries
+STREAM_CHUNK_SIZE = 200
+
+# app.bsky.feed.* collections stored as posts, checked with one set lookup per commit
+_FEED_COLLECTIONS = frozenset({
+    "app.bsky.feed.post",
+    "app.bsky.feed.like",
+    "app.bsky.feed.repost",
+    "app.bsky.feed.generator",
+    "app.bsky.feed.threadgate",
+    "app.bsky.feed.postgate",
+})
 
 
 class BlueskyPostRepository(BaseRepository[BlueskyPost]):
@@ -152,17 +290,20 @@ class BlueskyPostRepository(BaseRepository[BlueskyPost]):
         """Get a post by its URI."""
         return await self.get_by(uri=uri)
     
-    async def get_by_user_did(self, user_did: str, limit: int = 100, offset: int = 0) -> Sequence[BlueskyPost]:
+    async def get_by_user_did(self, user_did: str, limit: int = 100, offset: int = 0) -> AsyncIterator[BlueskyPost]:
         """
-        Get posts by a user's DID.
+        Stream posts by a user's DID.
+        
+        Rows are fetched from a server-side cursor in chunks of STREAM_CHUNK_SIZE,
+        so memory stays flat regardless of limit.
         
         Args:
             user_did: The DID of the user to get posts for.
             limit: Maximum number of posts to return.
             offset: Number of posts to skip.
             
-        Returns:
-            List of BlueskyPost instances.
+        Yields:
+            BlueskyPost instances, newest first.
         """
         query = (
             select(BlueskyPost)
@@ -172,20 +313,23 @@ class BlueskyPostRepository(BaseRepository[BlueskyPost]):
             .limit(limit)
             .offset(offset)
         )
-        result = await self.session.execute(query)
-        return result.scalars().all()
+        result = await self.session.stream_scalars(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        async for post in result:
+            yield post
     
-    async def get_replies_to_post(self, post_uri: str, limit: int = 100, offset: int = 0) -> Sequence[BlueskyPost]:
+    async def get_replies_to_post(self, post_uri: str, limit: int = 100, offset: int = 0) -> AsyncIterator[BlueskyPost]:
         """
-        Get replies to a specific post.
+        Stream replies to a specific post.
+        
+        Rows are fetched from a server-side cursor in chunks of STREAM_CHUNK_SIZE.
         
         Args:
             post_uri: The URI of the post to get replies for.
             limit: Maximum number of replies to return.
             offset: Number of replies to skip.
             
-        Returns:
-            List of BlueskyPost instances representing replies.
+        Yields:
+            BlueskyPost instances representing replies, newest first.
         """
         query = (
             select(BlueskyPost)
@@ -194,75 +338,81 @@ class BlueskyPostRepository(BaseRepository[BlueskyPost]):
             .limit(limit)
             .offset(offset)
         )
-        result = await self.session.execute(query)
+        result = await self.session.stream_scalars(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        async for post in result:
+            yield post
+    
+    async def search_text(self, query: str, limit: int = 100, offset: int = 0) -> Sequence[BlueskyPost]:
+        """
+        Case-insensitive substring search over post text.
+        
+        Uses ILIKE against the bare column so the ix_bluesky_post_text_search trigram
+        index applies; pg_trgm lowercases trigrams, so no lower() expression is needed.
+        
+        Args:
+            query: Text to search for. LIKE wildcards in it are matched literally.
+            limit: Maximum number of posts to return.
+            offset: Number of posts to skip.
+            
+        Returns:
+            List of matching BlueskyPost instances, newest first.
+        """
+        stmt = (
+            select(BlueskyPost)
+            .where(BlueskyPost.text.icontains(query, autoescape=True))
+            .order_by(BlueskyPost.bsky_created_at.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        result = await self.session.execute(stmt)
         return result.scalars().all()
     
-    async def process_post_commit(self, commit: Commit, user: BlueskyUser) -> Optional[BlueskyPost]:
+    async def process_post_commit(self, commit: Commit, user: Union[BlueskyUser, UserRef]) -> Optional[BlueskyPost]:
         """
         Process a post commit message from the Bluesky Firehose.
         
         Args:
             commit: The Commit object from the Firehose.
-            user: The BlueskyUser instance for the post author.
+            user: The post author, as a BlueskyUser or a cached UserRef.
             
         Returns:
             The created or updated BlueskyPost instance, or None if not applicable.
         """
         # Skip if not a post-related collection or missing record
-        if not commit.collection.startswith("app.bsky.feed.") or not commit.record:
+        if commit.collection not in _FEED_COLLECTIONS or not commit.record:
             return None
         
+        post_uri = f"at://{user.did}/{commit.collection}/{commit.rkey}"
+        
         # For delete operations, we need to find and mark the post
         if commit.operation == "delete":
-            post_uri = f"at://{user.did}/{commit.collection}/{commit.rkey}"
-            existing_post = await self.get_by_uri(post_uri)
-            if existing_post is not None:
-                # For delete operations, we update the post with a deletion marker
-                # rather than actually removing it, which preserves the historical data
-                
-                # Create a proper dictionary for additional_data
-                update_data: Dict[str, Any] = {
-                    "operation": "delete"
-                }
-                
-                # Handle additional_data separately to avoid type issues
-                timestamp = datetime.now().isoformat()
-                
-                # Create a new dictionary with the deletion timestamp
-                new_data: Dict[str, Any] = {"deleted_at": timestamp}
-                
-                # Try to merge with existing data if it exists
-                if existing_post.additional_data is not None:
-                    try:
-                        # SQLAlchemy normally returns JSONB as Python dicts
-                        if isinstance(existing_post.additional_data, dict):
-                            new_data = {**existing_post.additional_data, **new_data}
-                    except Exception as e:
-                        logger.warning(f"Could not merge additional_data: {e}")
-                
-                # Update the post with the new data
-                update_data: Dict[str, Any] = {
-                    "operation": "delete",
-                    "additional_data": new_data
-                }
-                
-                # Update the post
-                await self.update(
-                    existing_post.id,
-                    update_data
+            # For delete operations, we update the post with a deletion marker
+            # rather than actually removing it, which preserves the historical data.
+            # The marker is merged into additional_data with jsonb || in SQL, so the
+            # existing row never has to be read first. now() is the transaction start
+            # time, so every delete in a batch shares one timestamp and Python never
+            # has to read or format the clock.
+            deleted_marker = func.jsonb_build_object("deleted_at", func.now())
+            stmt = (
+                update(BlueskyPost)
+                .where(BlueskyPost.uri == post_uri)
+                .values(
+                    operation="delete",
+                    additional_data=func.coalesce(
+                        BlueskyPost.additional_data, func.jsonb_build_object()
+                    ).op("||")(deleted_marker),
                 )
-                logger.info(f"Marked post as deleted: {existing_post.uri}")
-            return existing_post
-        
-        # For create/update operations
-        post_uri = f"at://{user.did}/{commit.collection}/{commit.rkey}"
-        existing_post = await self.get_by_uri(post_uri)
-        
-        # Skip if record is None
-        if not commit.record:
-            return None
+                .returning(BlueskyPost)
+                .execution_options(synchronize_session=False, populate_existing=True)
+            )
+            result = await self.session.execute(stmt)
+            deleted_post = result.scalars().first()
+            if deleted_post is not None:
+                logger.debug("Marked post as deleted: %s", post_uri)
+            return deleted_post
         
-        # Extract post data
+        # Record fields are typed by the Jetstream models, so read them directly
+        record = commit.record
         post_data: Dict[str, Any] = {
             "uri": post_uri,
             "rev": commit.rev,
@@ -270,107 +420,38 @@ class BlueskyPostRepository(BaseRepository[BlueskyPost]):
             "collection": commit.collection,
             "operation": commit.operation,
             "user_id": user.id,
+            "cid": record.subject.cid if record.subject is not None else "",
+            "text": record.text,
+            "langs": record.langs,
+            "record_type": record.record_type,
+            "bsky_created_at": record.createdAt,
         }
         
-        # Add properties from record if it exists
-        if commit.record:
-            # Get CID safely using a safer approach
-            cid_value = ""
-            
-            # Check if record has a subject attribute
-            record_subject = getattr(commit.record, "subject", None)
-            
-            # If it has a subject, safely extract CID
-            if record_subject is not None:
-                # Extract CID as a string, if it exists
-                if hasattr(record_subject, "cid"):
-                    # Convert to string to ensure it's a valid string type
-                    cid_str = str(record_subject.cid) if record_subject.cid is not None else ""
-                    cid_value = cid_str
-            
-            # Now use the safely extracted CID value
-            record_data: Dict[str, Any] = {
-                "cid": cid_value,
-                "text": getattr(commit.record, "text", None),
-                "langs": getattr(commit.record, "langs", None),
-                "record_type": getattr(commit.record, "record_type", ""),
-                "bsky_created_at": getattr(commit.record, "createdAt", datetime.now()),
-            }
-            post_data.update(record_data)
-        
-        # Handle reply data if present, with proper error handling
-        if commit.record and hasattr(commit.record, "reply") and commit.record.reply:
-            try:
-                reply_data: Dict[str, Any] = {}
-                
-                # Get parent data if available
-                parent = getattr(commit.record.reply, "parent", None)
-                if parent is not None:
-                    if hasattr(parent, "cid"):
-                        reply_data["parent_cid"] = str(parent.cid)
-                    if hasattr(parent, "uri"):
-                        reply_data["parent_uri"] = str(parent.uri)
-                
-                # Get root data if available
-                root = getattr(commit.record.reply, "root", None)
-                if root is not None:
-                    if hasattr(root, "cid"):
-                        reply_data["root_cid"] = str(root.cid)
-                    if hasattr(root, "uri"):
-                        reply_data["root_uri"] = str(root.uri)
-                
-                # Update post_data with reply information
-                if reply_data:
-                    post_data.update(reply_data)
-            except (AttributeError, TypeError) as e:
-                # Log error but continue processing
-                logger.warning(f"Error processing reply data: {e}")
-        
-        # Store additional data as JSON
-        if commit.record:
-            try:
-                # Extract record data as a dictionary
-                record_dict = {}
-                try:
-                    # Pydantic v2 approach
-                    if hasattr(commit.record, "model_dump"):
-                        record_dict = commit.record.model_dump(by_alias=False)
-                    # Pydantic v1 approach
-                    elif hasattr(commit.record, "dict"):
-                        record_dict = commit.record.dict()
-                except Exception as e:
-                    logger.warning(f"Could not convert record to dictionary: {e}")
-                
-                # Extract fields not already stored in other columns
-                excluded_fields = ["text", "langs", "createdAt", "record_type", "subject", "reply"]
-                
-                # Safely ensure record_dict is a dict for .items() call
-                if isinstance(record_dict, dict):
-                    additional_fields = {k: v for k, v in record_dict.items() 
-                                    if k not in excluded_fields and not k.startswith('_')}
-                    
-                    # Store the additional fields
-                    post_data["additional_data"] = additional_fields
-                    
-                    logger.debug(f"Stored additional data with {len(additional_fields)} fields")
-                else:
-                    logger.warning(f"record_dict is not a dictionary: {type(record_dict)}")
-            except Exception as e:
-                logger.warning(f"Could not extract additional data: {e}", exc_info=True)
-        
-        if existing_post is not None:
-            # Update the existing post
-            updated_post = await self.update(
-                existing_post.id, 
-                post_data
-            )
-            logger.info(f"Updated post: {post_uri}")
-            return ensure_not_none(updated_post, existing_post)
-        else:
-            # Create a new post
-            new_post = await self.create(post_data)
-            logger.info(f"Created new post: {post_uri}")
-            return new_post
+        # Reply parent and root are both required on a Reply
+        if record.reply is not None:
+            post_data["parent_cid"] = record.reply.parent.cid
+            post_data["parent_uri"] = record.reply.parent.uri
+            post_data["root_cid"] = record.reply.root.cid
+            post_data["root_uri"] = record.reply.root.uri
+        
+        # Store fields not already stored in other columns as JSON. Every declared
+        # Record field has its own column, so that is exactly the undeclared extras,
+        # which pydantic keeps as plain JSON values and need no model_dump
+        additional_fields = {
+            k: v for k, v in (record.model_extra or {}).items()
+            if not k.startswith('_')
+        }
+        post_data["additional_data"] = additional_fields
+        
+        # Create or update in one atomic statement keyed on the unique uri,
+        # instead of a lookup followed by an INSERT or UPDATE
+        stmt = pg_insert(BlueskyPost).values(**post_data)
+        set_: Dict[str, Any] = {key: stmt.excluded[key] for key in post_data if key != "uri"}
+        set_["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(index_elements=["uri"], set_=set_).returning(BlueskyPost)
+        result = await self.session.execute(stmt, execution_options={"populate_existing": True})
+        logger.debug("Upserted post: %s", post_uri)
+        return result.scalars().one()
 
 
 class RawMessageRepository(BaseRepository[RawMessage]):
@@ -379,22 +460,14 @@ class RawMessageRepository(BaseRepository[RawMessage]):
     def __init__(self, session: AsyncSession):
         super().__init__(RawMessage, session)
     
-    def _serialize_for_json(self, obj: Any) -> Any:
-        """Convert Python objects to JSON serializable values"""
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        elif isinstance(obj, dict):
-            return {k: self._serialize_for_json(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._serialize_for_json(item) for item in obj]
-        return obj
-
-    async def store_raw_message(self, message: Message) -> RawMessage:
+    async def store_raw_message(self, message: Message, processed: bool = False) -> RawMessage:
         """
         Store a raw Bluesky message.
         
         Args:
             message: The Message object from Bluesky.
+            processed: Value for the processed flag. Callers that process the message
+                in the same transaction pass True, saving a separate mark_as_processed.
             
         Returns:
             The created RawMessage instance.
@@ -404,7 +477,7 @@ class RawMessageRepository(BaseRepository[RawMessage]):
             "did": message.did,
             "time_us": message.time_us,
             "kind": message.kind,
-            "processed": False,
+            "processed": processed,
         }
         
         # Basic raw data that's always available
@@ -416,31 +489,91 @@ class RawMessageRepository(BaseRepository[RawMessage]):
         
         # Try to add more fields from the message
         try:
-            # Serialize to get all fields
-            obj_dict = None
-            if hasattr(message, "model_dump"):
-                obj_dict = message.model_dump()
-            elif hasattr(message, "dict"):
-                obj_dict = message.dict()
-            
-            # If we got a dictionary, convert datetime objects and merge it
-            if isinstance(obj_dict, dict):
-                # Convert datetimes to ISO strings so they're JSON serializable
-                serialized_dict = self._serialize_for_json(obj_dict)
-                for k, v in serialized_dict.items():
-                    raw_data[k] = v
+            # JSON mode renders datetimes as ISO strings inside pydantic-core,
+            # so the dict is JSONB-ready without a recursive walk in Python
+            raw_data.update(message.model_dump(mode="json"))
         except Exception as e:
             # Log but continue with base data
-            logger.warning(f"Error serializing message: {e}")
+            logger.warning("Error serializing message: %s", e)
             raw_data["error"] = str(e)
         
         # Set the processed raw_data
         message_data["raw_data"] = raw_data
         
         raw_message = await self.create(message_data)
-        logger.debug(f"Stored raw message: {message.kind} from {message.did}")
+        logger.debug("Stored raw message: %s from %s", message.kind, message.did)
         return raw_message
     
+    async def copy_raw_messages(self, messages: Sequence[Message], processed: bool = False) -> List[uuid.UUID]:
+        """
+        Archive a batch of raw Bluesky messages with PostgreSQL COPY.
+        
+        COPY skips per-row parse/plan work, which makes it the fastest way to
+        append large batches to the archival table. Rows are written on the
+        session's connection inside its transaction, which is begun first if no
+        statement has run yet, so they commit or roll back with the session.
+        Drivers without COPY support fall back to a multi-row INSERT.
+        
+        Args:
+            messages: The Message objects to archive.
+            processed: Value for the processed flag of every row.
+            
+        Returns:
+            The ids of the archived rows, in the same order as messages.
+        """
+        if not messages:
+            return []
+        
+        ids = [uuid7() for _ in messages]
+        payloads = [message.model_dump(mode="json") for message in messages]
+        
+        # COPY is driver-level, so go through the asyncpg connection behind the session
+        conn = await self.session.connection()
+        raw_conn = await conn.get_raw_connection()
+        driver_conn = raw_conn.driver_connection
+        if not hasattr(driver_conn, "copy_records_to_table"):
+            # Ids are generated here, so there is nothing to read back: a plain
+            # executemany INSERT without RETURNING skips building ORM objects per row
+            await self.session.execute(insert(RawMessage), [
+                {
+                    "id": id_,
+                    "did": message.did,
+                    "time_us": message.time_us,
+                    "kind": message.kind,
+                    "raw_data": payload,
+                    "processed": processed,
+                }
+                for id_, message, payload in zip(ids, messages, payloads)
+            ])
+            return ids
+        
+        if not driver_conn.is_in_transaction():
+            # The asyncpg adapter only sends BEGIN with the first statement run through
+            # it, and COPY bypasses the adapter; without this the COPY would autocommit
+            # and survive a later rollback of the session
+            await conn.exec_driver_sql("SELECT 1")
+        
+        records = [
+            (
+                id_,
+                message.did,
+                message.time_us,
+                message.kind,
+                # asyncpg's jsonb codec expects text; JSON mode already renders datetimes as ISO strings
+                orjson.dumps(payload).decode(),
+                processed,
+            )
+            for id_, message, payload in zip(ids, messages, payloads)
+        ]
+        await driver_conn.copy_records_to_table(
+            RawMessage.__tablename__,
+            records=records,
+            # created_at/updated_at are filled by their server defaults
+            columns=["id", "did", "time_us", "kind", "raw_data", "processed"],
+        )
+        logger.debug("Copied %d raw messages", len(records))
+        return ids
+    
     async def mark_as_processed(self, message_id: str) -> Optional[RawMessage]:
         """
         Mark a raw message as processed.
@@ -453,21 +586,76 @@ class RawMessageRepository(BaseRepository[RawMessage]):
         """
         return await self.update(message_id, {"processed": True})
     
-    async def get_unprocessed(self, limit: int = 100) -> Sequence[RawMessage]:
+    async def mark_many_processed(self, message_ids: Sequence[uuid.UUID]) -> int:
         """
-        Get unprocessed raw messages.
+        Mark a batch of raw messages as processed with one UPDATE.
         
         Args:
-            limit: Maximum number of messages to return.
+            message_ids: The IDs of the RawMessages to mark.
             
         Returns:
-            List of unprocessed RawMessage instances.
+            The number of rows updated.
         """
-        query = (
-            select(RawMessage)
+        if not message_ids:
+            return 0
+        stmt = (
+            update(RawMessage)
+            .where(RawMessage.id.in_(message_ids))
+            .values(processed=True)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount
+    
+    async def delete_many(self, message_ids: Sequence[uuid.UUID]) -> int:
+        """
+        Delete the given raw messages with one DELETE.
+        
+        Args:
+            message_ids: The IDs of the RawMessages to delete.
+            
+        Returns:
+            The number of rows deleted.
+        """
+        if not message_ids:
+            return 0
+        stmt = (
+            delete(RawMessage)
+            .where(RawMessage.id.in_(message_ids))
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount
+    
+    async def claim_batch(self, limit: int = 100) -> Sequence[RawMessage]:
+        """
+        Atomically claim the oldest unprocessed raw messages.
+        
+        Selecting with FOR UPDATE SKIP LOCKED and flipping processed in the same
+        UPDATE ... RETURNING means concurrent workers never claim the same row,
+        and no separate mark_as_processed round-trip is needed.
+        
+        Args:
+            limit: Maximum number of messages to claim.
+            
+        Returns:
+            The claimed RawMessage instances, payload included.
+        """
+        claimable = (
+            select(RawMessage.id)
             .where(RawMessage.processed == False)  # Using standard comparison for clarity
             .order_by(RawMessage.time_us.asc())
             .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(RawMessage)
+            .where(RawMessage.id.in_(claimable))
+            .values(processed=True)
+            .returning(RawMessage)
+            .options(undefer(RawMessage.raw_data))
+            .execution_options(synchronize_session=False)
         )
-        result = await self.session.execute(query)
+        result = await self.session.execute(stmt)
         return result.scalars().all()
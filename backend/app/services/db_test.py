@@ -7,36 +7,51 @@ and perform basic operations to verify database functionality.
 
 import asyncio
 import logging
+import time
 from sqlalchemy import text
 
-from app.core.database import AsyncSessionLocal
+from app.core.database import get_engine
 from app.db.init_db import init_db
 
 logger = logging.getLogger(__name__)
 
+# Seconds a successful probe is reused, so frequent health checks don't each hit the database
+PROBE_CACHE_SECONDS = 5.0
+
+# Monotonic time of the last successful probe; failures are never cached
+_last_ok: float | None = None
+_probe_lock = asyncio.Lock()
+
 
 async def test_database_connection() -> bool:
     """
     Test the connection to the PostgreSQL database.
     
     Executes a simple query to verify that the connection works
-    and the database is responsive.
+    and the database is responsive. A success is reused for
+    PROBE_CACHE_SECONDS.
     """
-    logger.info("Testing database connection...")
-    async with AsyncSessionLocal() as session:
+    global _last_ok
+    # Concurrent callers wait for one in-flight probe instead of each running their own
+    async with _probe_lock:
+        if _last_ok is not None and time.monotonic() - _last_ok < PROBE_CACHE_SECONDS:
+            return True
+        
+        logger.info("Testing database connection...")
         try:
-            # Simple test query
-            result = await session.execute(text("SELECT 1"))
-            value = result.scalar()
+            # A pooled connection is enough for SELECT 1; no session or ORM state needed
+            async with get_engine().connect() as conn:
+                value = await conn.scalar(text("SELECT 1"))
             
             if value == 1:
                 logger.info("✅ Database connection successful!")
+                _last_ok = time.monotonic()
                 return True
             else:
                 logger.error("❌ Database connection test failed: unexpected result")
                 return False
         except Exception as e:
-            logger.error(f"❌ Database connection test failed: {e}")
+            logger.error("❌ Database connection test failed: %s", e)
             return False
 
 
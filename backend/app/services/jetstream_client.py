@@ -7,21 +7,39 @@ parsed Message objects.
 """
 
 import logging
+import re
 import zstandard as zstd
-import json
 import asyncio
+import contextlib
+import time
 from datetime import datetime, timezone
 
 import urllib.parse
 from app.models import jetstream_types
-from app.models.jetstream_types import Message
-from typing import Optional, AsyncGenerator, Dict, Any, List
+from app.models.jetstream_types import MESSAGE_ADAPTER, FastMessage, Message
+from typing import Literal, Optional, AsyncGenerator, Dict, Any, List, Union, overload
+import orjson
 from pydantic import ValidationError
 from websockets import ConnectionClosedOK, ConnectionClosedError
 from websockets.asyncio.client import connect, ClientConnection
 
 logger: logging.Logger = logging.getLogger(__name__)
 
+# Characters allowed unescaped in a query value; NSIDs (including wildcards like
+# app.bsky.graph.*) and DIDs only ever use these
+_QUERY_SAFE = re.compile(r'[A-Za-z0-9._~:*-]+')
+
+# Reconnect backoff in seconds: starts short so a transient blip costs little dead time,
+# doubles per consecutive failure up to the cap, and resets after a clean streaming period
+RECONNECT_BACKOFF_BASE = 0.1
+RECONNECT_BACKOFF_MAX = 30.0
+RECONNECT_RESET_AFTER = 60.0
+
+
+def _quote_query_value(value: str) -> str:
+    """Percent-encode a query value, skipping the per-character quoting when it's already safe."""
+    return value if _QUERY_SAFE.fullmatch(value) else urllib.parse.quote_plus(value)
+
 
 class JetstreamClient:
     """Client for connecting to and streaming Jetstream messages."""
@@ -39,7 +57,8 @@ class JetstreamClient:
         collections: List[str] = [], 
         max_message_size_bytes: int = 0, 
         wanted_dids: List[str] = [],
-        compress: bool = False
+        compress: bool = False,
+        zstd_dictionary: Optional[bytes] = None
     ) -> None:
         """
         Initialize the Jetstream Client.
@@ -50,9 +69,16 @@ class JetstreamClient:
             max_message_size_bytes: Max message size. Defaults to no limit (0).
             wanted_dids: List of DIDs for retrieving specific records.
             compress: Whether to deliver compressed data. Defaults to false.
+            zstd_dictionary: Raw zstd dictionary the server compresses frames with.
+                Jetstream compresses every message as its own frame against a shared
+                dictionary, so it is required when compress is true. Use
+                pkg/models/zstd_dictionary from the Jetstream release the server runs.
         """
         if host not in self.JETSTREAM_HOSTS:
             raise ValueError(f'Invalid Jetstream host specified: {host}. Must be one of {", ".join(self.JETSTREAM_HOSTS.keys())}')
+        if compress and not zstd_dictionary:
+            # Compressed frames can't be decoded without the server's dictionary
+            raise ValueError('compress=True requires the Jetstream zstd_dictionary')
         
         self.host: str = f'wss://{self.JETSTREAM_HOSTS[host]}/subscribe'
         self.collections: List[str] = collections
@@ -61,7 +87,45 @@ class JetstreamClient:
         self.compress: bool = compress
         self.websocket: Optional[ClientConnection] = None
         self.last_cursor: Optional[int] = None
-        self._decompressor: Optional[zstd.ZstdDecompressor] = None if not compress else zstd.ZstdDecompressor()
+        # One decompressor (and its decompression context and loaded dictionary) is
+        # reused for every frame. Each message is a complete frame, so one-shot
+        # decompress fits better than a streaming decompressobj.
+        self._decompressor: Optional[zstd.ZstdDecompressor] = None
+        self._zstd_dict: Optional[zstd.ZstdCompressionDict] = None
+        # Frame dictionary id is checked against the loaded one on the first frame only
+        self._zstd_dict_checked = False
+        if compress and zstd_dictionary:
+            self._zstd_dict = zstd.ZstdCompressionDict(zstd_dictionary)
+            self._decompressor = zstd.ZstdDecompressor(dict_data=self._zstd_dict)
+        # The subscription options don't change after construction, so build the
+        # (possibly long, per-DID) query string once instead of on every reconnect
+        self._url: str = self._get_subscription_url()
+
+    def _check_frame_dictionary(self, frame: bytes) -> None:
+        """Warn if the server compresses with a different dictionary than the loaded one."""
+        self._zstd_dict_checked = True
+        if self._zstd_dict is None:
+            return
+        frame_dict_id = zstd.get_frame_parameters(frame).dict_id
+        if frame_dict_id and frame_dict_id != self._zstd_dict.dict_id():
+            logger.warning(
+                'Jetstream frame uses zstd dictionary %s, but dictionary %s is loaded',
+                frame_dict_id,
+                self._zstd_dict.dict_id(),
+            )
+
+    def _connect_options(self) -> Dict[str, Any]:
+        """Keyword arguments for websockets' connect(), shared by connect and resume."""
+        return {
+            # Buffer more frames between the reader and stream_messages, so bursts
+            # don't pause reading from the socket after every few frames
+            'max_queue': 1024,
+            'write_limit': 1 << 20,
+            'max_size': 1 << 24,
+            # zstd frames don't shrink further under permessage-deflate; only pay for
+            # deflate when the server sends plain JSON
+            'compression': None if self.compress else 'deflate',
+        }
 
     def _get_subscription_url(self) -> str:
         """Get the full subscription URL with query parameters."""
@@ -73,9 +137,9 @@ class JetstreamClient:
         if self.compress:
             query_params.append(f'compress={self.compress}')
         for collection in self.collections:
-            query_params.append(f'wantedCollections={urllib.parse.quote_plus(collection)}')
+            query_params.append(f'wantedCollections={_quote_query_value(collection)}')
         for wanted_did in self.wanted_dids:
-            query_params.append(f'wantedDids={urllib.parse.quote_plus(wanted_did)}')
+            query_params.append(f'wantedDids={_quote_query_value(wanted_did)}')
 
         if query_params:
             return f'{self.host}?{"&".join(query_params)}'
@@ -88,15 +152,15 @@ class JetstreamClient:
         Returns:
             The websocket connection.
         """
-        logger.info(f'Connecting to {self.host}...')
+        logger.info('Connecting to %s...', self.host)
         if self.websocket is None:
             try:
-                url: str = self._get_subscription_url()
-                logger.info(f'Full URL: {url}')
-                self.websocket = await connect(url)
-                logger.info(f'Connected successfully')
+                url: str = self._url
+                logger.info('Full URL: %s', url)
+                self.websocket = await connect(url, **self._connect_options())
+                logger.info('Connected successfully')
             except Exception as e:
-                logger.exception(f'Connection error: {e}')            
+                logger.exception('Connection error: %s', e)            
                 raise e
         return self.websocket
 
@@ -110,12 +174,12 @@ class JetstreamClient:
         """Close the connection (alias for disconnect)."""
         await self.disconnect()
     
-    async def stream_messages(self) -> AsyncGenerator[Message, None]:
+    async def _stream_payloads(self) -> AsyncGenerator[str | bytes, None]:
         """
-        Stream raw messages from the Jetstream Jetstream.
+        Stream decompressed frame payloads from the Jetstream.
         
         Yields:
-            Raw message strings from the Jetstream.
+            The JSON text of each frame, as bytes or str.
         """
         if self.websocket is None:
             self.websocket = await self.connect()
@@ -123,77 +187,112 @@ class JetstreamClient:
         try:
             async for msg in self.websocket:
                 # Handle compressed data if needed
-                if self.compress and self._decompressor and isinstance(msg, bytes):
-                    # Decompress message if compression is enabled and msg is bytes
-                    msg_bytes = self._decompressor.decompress(msg)
-                    msg_str = msg_bytes.decode('utf-8')
+                # websockets yields bytes for binary frames and str for text frames.
+                # Both parsers accept either directly, so neither is re-encoded
+                if isinstance(msg, bytes):
+                    if self._decompressor and not self._zstd_dict_checked:
+                        self._check_frame_dictionary(msg)
+                    # Compressed frames are binary; decompress if compression is enabled
+                    yield self._decompressor.decompress(msg) if self._decompressor else msg
                 elif isinstance(msg, str):
-                    # If it's already a string, use it directly
-                    msg_str = msg
+                    yield msg
                 else:
-                    # Convert any other type to string as best as possible
-                    msg_str = str(msg)
-                
-                # Parse the message into a Message object
-                try:
-                    message_data = json.loads(msg_str)
-                    message = Message.model_validate(message_data)
-                    yield message
-                except json.JSONDecodeError as e:
-                    logger.error(f'Failed to parse JSON: {e}')
-                    continue
-                except ValidationError as e:
-                    logger.warning(f'Validation error for message: {e}')
-                    # Create a simplified message with basic info to continue processing
-                    try:
-                        # Extract essential fields from the raw message
-                        if isinstance(message_data, dict):
-                            basic_message = {
-                                "did": message_data.get("did", ""),
-                                "time_us": message_data.get("time_us", 0),
-                                "kind": message_data.get("kind", "commit"),
-                                # Include other top-level fields but without validation
-                                "raw_data": message_data  # Store the original data for debugging
-                            }
-                            
-                            # Try to create a simplified message object
-                            # This will skip detailed validation
-                            logger.debug(f'Attempting to create simplified message for {basic_message["did"]}')
-                            continue  # Skip this message for now
-                    except Exception as ex:
-                        logger.error(f'Failed to create simplified message: {ex}')
-                        continue
+                    logger.warning('Dropping frame of unexpected type %s', type(msg).__name__)
         except ConnectionClosedOK:
             logger.info('Connection closed normally.')
-        except ConnectionClosedError as e:
-            logger.error(f'Connection closed with error: {e}')
-            # Try to reconnect
-            await asyncio.sleep(5)  # Wait before reconnecting
-            self.websocket = None
-            await self.connect()
+        except ConnectionClosedError:
+            # Reconnecting is left to subscribe(), so only one place retries
+            raise
         except Exception as e:
-            logger.exception(f'Error in stream_messages: {e}')
+            logger.exception('Error in stream_messages: %s', e)
             raise
+    
+    async def stream_messages(self) -> AsyncGenerator[Message, None]:
+        """
+        Stream validated messages from the Jetstream.
+        
+        Yields:
+            Parsed Message objects from the Jetstream.
+        """
+        async for payload in self._stream_payloads():
+            # Parse and validate in one pass with pydantic-core's JSON parser,
+            # instead of building an intermediate dict with json.loads
+            try:
+                message = MESSAGE_ADAPTER.validate_json(payload)
+            except ValidationError as e:
+                # Malformed JSON and schema mismatches both surface here; skip the frame
+                logger.warning('Validation error for message: %s', e)
+                continue
+            yield message
+    
+    async def stream_fast_messages(self) -> AsyncGenerator[FastMessage, None]:
+        """
+        Stream messages parsed with orjson, without pydantic validation.
+        
+        Only the envelope fields are extracted; the frame's JSON bytes are
+        passed through untouched in FastMessage.raw. Suited to consumers that
+        forward messages rather than read them, such as the Kafka ingest.
+        
+        Yields:
+            FastMessage tuples from the Jetstream.
+        """
+        async for payload in self._stream_payloads():
+            try:
+                data = orjson.loads(payload)
+                commit = data.get("commit") or {}
+                message = FastMessage(
+                    did=data["did"],
+                    time_us=data["time_us"],
+                    kind=data["kind"],
+                    collection=commit.get("collection"),
+                    rkey=commit.get("rkey"),
+                    raw=payload if isinstance(payload, bytes) else payload.encode(),
+                )
+            except (orjson.JSONDecodeError, KeyError, AttributeError, TypeError) as e:
+                # Either malformed JSON or a frame without the envelope fields; skip it
+                logger.warning('Malformed message skipped: %r', e)
+                continue
+            yield message
 
-    async def subscribe(self) -> AsyncGenerator[Message, None]:
+    @overload
+    def subscribe(self, fast: Literal[False] = False) -> AsyncGenerator[Message, None]: ...
+    @overload
+    def subscribe(self, fast: Literal[True]) -> AsyncGenerator[FastMessage, None]: ...
+    
+    async def subscribe(self, fast: bool = False) -> AsyncGenerator[Union[Message, FastMessage], None]:
         """
         Subscribe to Jetstream and yield parsed Message objects.
         
+        Args:
+            fast: Yield unvalidated FastMessage tuples from stream_fast_messages
+                instead of validated Message objects.
+        
         Yields:
-            Parsed Message objects from the Jetstream.
+            Parsed Message objects (or FastMessage tuples) from the Jetstream.
         """
         connection_attempts = 0
         max_attempts = 5
         retry_delay = 5  # seconds
+        connected_at = time.monotonic()
+        # Consecutive drops that were closed with an error, for the reconnect backoff
+        drop_attempts = 0
         
         while connection_attempts < max_attempts:
             try:
-                async for message in self.stream_messages():
-                    # Log a condensed version of the message for debugging
-                    if message.kind == 'commit' and message.commit:
-                        logger.debug(f"Received commit: {message.did} - {message.commit.collection}/{message.commit.rkey}")
-                    else:
-                        logger.debug(f"Received {message.kind} message from {message.did}")
+                if self.websocket is None:
+                    await self.connect()
+                connected_at = time.monotonic()
+                messages = self.stream_fast_messages() if fast else self.stream_messages()
+                async for message in messages:
+                    # Log a condensed version of the message for debugging; check the
+                    # level once so the branch is skipped entirely when DEBUG is off
+                    if logger.isEnabledFor(logging.DEBUG):
+                        if isinstance(message, FastMessage) and message.collection is not None:
+                            logger.debug("Received commit: %s - %s/%s", message.did, message.collection, message.rkey)
+                        elif isinstance(message, Message) and message.kind == 'commit' and message.commit:
+                            logger.debug("Received commit: %s - %s/%s", message.did, message.commit.collection, message.commit.rkey)
+                        else:
+                            logger.debug("Received %s message from %s", message.kind, message.did)
                     
                     # Update last cursor
                     self.last_cursor = message.time_us
@@ -201,30 +300,116 @@ class JetstreamClient:
                     yield message
                 
                 # If we reach here, the connection was closed normally
-                # Reset the connection and try again
+                # Reset the connection and reconnect on the next pass
                 logger.info("Connection closed, reconnecting...")
                 self.websocket = None
-                await asyncio.sleep(retry_delay)
-                await self.connect()
+                await asyncio.sleep(RECONNECT_BACKOFF_BASE)
+                
+            except ConnectionClosedError as e:
+                # Transient drop: reconnect almost immediately, backing off only if
+                # drops keep happening without a clean streaming period in between
+                if time.monotonic() - connected_at >= RECONNECT_RESET_AFTER:
+                    drop_attempts = 0
+                wait_time = min(RECONNECT_BACKOFF_BASE * (2 ** drop_attempts), RECONNECT_BACKOFF_MAX)
+                drop_attempts += 1
+                logger.warning("Connection closed with error: %s. Reconnecting in %.1f seconds...", e, wait_time)
+                self.websocket = None
+                await asyncio.sleep(wait_time)
                 
             except Exception as e:
                 # Handle any other exceptions
                 connection_attempts += 1
-                logger.error(f"Connection error (attempt {connection_attempts}/{max_attempts}): {e}")
+                logger.error("Connection error (attempt %s/%s): %s", connection_attempts, max_attempts, e)
                 
                 if connection_attempts >= max_attempts:
-                    logger.error(f"Max connection attempts reached. Giving up.")
+                    logger.error("Max connection attempts reached. Giving up.")
                     raise
                 
                 # Exponential backoff for retry
                 wait_time = retry_delay * (2 ** (connection_attempts - 1))
-                logger.info(f"Retrying in {wait_time} seconds...")
+                logger.info("Retrying in %s seconds...", wait_time)
                 await asyncio.sleep(wait_time)
                 
-                # Reset the connection
+                # Reset the connection; the next pass reconnects
                 self.websocket = None
-                await self.connect()
         
+    async def subscribe_to_queue(self, queue: asyncio.Queue, fast: bool = False) -> None:
+        """
+        Subscribe to Jetstream and put every message onto a queue.
+        
+        Decouples reading the websocket from whatever consumes the messages, so a
+        slow consumer doesn't stall reading frames until the queue is full. Use a
+        bounded queue so it pushes back instead of growing without limit.
+        
+        Args:
+            queue: Queue to put messages onto.
+            fast: Put unvalidated FastMessage tuples instead of validated Message objects.
+        """
+        async for message in self.subscribe(fast=fast):
+            await queue.put(message)
+    
+    async def subscribe_batched(
+        self, max_batch: int = 64, max_wait: float = 0.02, fast: bool = False
+    ) -> AsyncGenerator[List[Union[Message, FastMessage]], None]:
+        """
+        Subscribe to Jetstream and yield messages in batches.
+        
+        A reader task puts messages onto a queue as frames arrive; each batch takes
+        everything already queued, waiting at most max_wait after the first message
+        for the batch to fill. Consumers then pay their per-iteration overhead once
+        per batch instead of once per frame.
+        
+        Args:
+            max_batch: Largest number of messages in a batch.
+            max_wait: Seconds to wait after a batch's first message for more to arrive.
+            fast: Yield unvalidated FastMessage tuples instead of validated Message objects.
+        
+        Yields:
+            Non-empty lists of messages, in stream order.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_batch * 4)
+        reader = asyncio.create_task(self.subscribe_to_queue(queue, fast=fast))
+        loop = asyncio.get_running_loop()
+        get: Optional[asyncio.Future] = None
+        try:
+            while True:
+                if not queue.empty():
+                    batch = [queue.get_nowait()]
+                elif reader.done():
+                    # Everything the reader queued has been yielded; surface its error, if any
+                    reader.result()
+                    return
+                else:
+                    # Wake up if the reader stops, so its error isn't swallowed
+                    get = asyncio.ensure_future(queue.get())
+                    await asyncio.wait((get, reader), return_when=asyncio.FIRST_COMPLETED)
+                    if not get.done():
+                        # Drain what is left in the queue before returning on the next pass
+                        get.cancel()
+                        get = None
+                        continue
+                    batch = [get.result()]
+                    get = None
+                deadline = loop.time() + max_wait
+                while len(batch) < max_batch:
+                    if not queue.empty():
+                        batch.append(queue.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0 or reader.done():
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                yield batch
+        finally:
+            if get is not None:
+                get.cancel()
+            reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await reader
+    
     async def resume_from_cursor(self, cursor: Optional[int] = None) -> None:
         """
         Resume Jetstream from a specific cursor.
@@ -242,24 +427,14 @@ class JetstreamClient:
         # Reconnect with the cursor parameter
         self.websocket = None
         
-        query_params = [f'cursor={resume_cursor}']
-        # Add other parameters
-        if self.max_message_size_bytes > 0:
-            query_params.append(f'max_message_size_bytes={self.max_message_size_bytes}')
-        if self.compress:
-            query_params.append(f'compress={self.compress}')
-        for collection in self.collections:
-            query_params.append(f'wantedCollections={urllib.parse.quote_plus(collection)}')
-        for wanted_did in self.wanted_dids:
-            query_params.append(f'wantedDids={urllib.parse.quote_plus(wanted_did)}')
-            
-        url = f'{self.host}?{"&".join(query_params)}'
-        logger.info(f'Resuming from cursor {resume_cursor}')
-        logger.info(f'Resume URL: {url}')
+        # Append the cursor to the prebuilt subscription URL
+        url = f'{self._url}{"&" if "?" in self._url else "?"}cursor={resume_cursor}'
+        logger.info('Resuming from cursor %s', resume_cursor)
+        logger.info('Resume URL: %s', url)
         
         try:
-            self.websocket = await connect(url)
-            logger.info(f'Reconnected from cursor {resume_cursor}')
+            self.websocket = await connect(url, **self._connect_options())
+            logger.info('Reconnected from cursor %s', resume_cursor)
         except Exception as e:
-            logger.exception(f'Failed to resume from cursor: {e}')
+            logger.exception('Failed to resume from cursor: %s', e)
             raise
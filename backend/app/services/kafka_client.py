@@ -1,20 +1,36 @@
-from datetime import date, datetime, timezone, timedelta
-import json
+import asyncio
+from collections import deque
+from datetime import datetime, timezone, timedelta
 import logging
+import orjson
 from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
-from app.core.config import kafka_settings, KafkaSettings
-from typing import Any, Dict, Optional
+from app.core.config import get_kafka_settings, KafkaSettings
+from app.models.jetstream_types import FastMessage
+from typing import Any, Dict, Optional, Union
 
 logger: logging.Logger = logging.getLogger(__name__)
 
+
+def _json_default(obj: Any) -> Any:
+    """Fallback for values orjson can't encode natively."""
+    # Let pydantic models serialize themselves
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    # For any other types, let the JSON encoder raise the TypeError
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
 class KafkaClient:
 
-    def __init__(self, settings: KafkaSettings = kafka_settings):
-        self.settings: KafkaSettings = settings
+    def __init__(self, settings: Optional[KafkaSettings] = None):
+        self.settings: KafkaSettings = settings if settings is not None else get_kafka_settings()
         self.consumer: Optional[AIOKafkaConsumer] = None
         self.producer: Optional[AIOKafkaProducer] = None
         self._producer_closing = False
         self._consumer_closing = False
+        self._producer_started = False
+        self._consumer_started = False
+        # Delivery futures of sends the broker hasn't acknowledged yet
+        self._pending_sends: deque[asyncio.Future] = deque()
 
 
     def json_serializer(self, data) -> bytes:
@@ -22,17 +38,11 @@ class KafkaClient:
         AIOKafka-compatible serializer that handles datetime, date, and other 
         Python objects automatically. Returns bytes because that's what Kafka expects.
         """
-        def default(obj):
-            # Handle the most common Python types that json can't serialize
-            if isinstance(obj, (datetime, date)):
-                return obj.isoformat()
-            # Let pydantic models serialize themselves
-            if hasattr(obj, 'model_dump'):
-                return obj.model_dump()
-            # For any other types, let the JSON encoder raise the TypeError
-            return obj
-    
-        return json.dumps(data, default=default).encode('utf-8')
+        # Already-encoded JSON (e.g. a forwarded Jetstream frame) goes out as is
+        if isinstance(data, bytes):
+            return data
+        # orjson encodes datetime/date natively and already returns bytes
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
 
     async def create_consumer(self, group_id: str, id: str) -> None:
 
@@ -55,6 +65,8 @@ class KafkaClient:
                 bootstrap_servers=self.settings.KAFKA_BOOTSTRAP_SERVERS,
                 linger_ms=self.settings.KAFKA_LINGER_MS,
                 max_batch_size=self.settings.KAFKA_BATCH_SIZE,
+                compression_type=self.settings.KAFKA_COMPRESSION_TYPE,
+                acks=self.settings.KAFKA_ACKS,
                 value_serializer=self.json_serializer
             )
             self._producer_closing = False
@@ -63,32 +75,119 @@ class KafkaClient:
     async def ensure_producer(self):
         await self.create_producer(self.settings.KAFKA_GROUP_ID_BSKY)
         assert self.producer is not None
+        if self._producer_started:
+            return
         logger.debug('Starting producer. . . .')
         await self.producer.start()
+        self._producer_started = True
         logger.debug('Producer started.')
 
     async def ensure_consumer(self):
         await self.create_consumer(self.settings.KAFKA_GROUP_ID_BSKY, f'{datetime.now(timezone(timedelta(0)))}')
         assert self.consumer is not None
+        if self._consumer_started:
+            return
         logger.debug('Starting consumer. . . .')
         await self.consumer.start()
+        self._consumer_started = True
         logger.debug('Consumer started.')
 
-    async def produce_msg(self, topic: str, msg: Dict[str, Any]) -> None:
+    async def ensure_started(self) -> None:
+        """Start the producer and consumer concurrently, overlapping their broker bootstrap."""
+        await asyncio.gather(self.ensure_producer(), self.ensure_consumer())
+
+    async def produce_msg(self, topic: str, msg: Union[Dict[str, Any], bytes]) -> None:
+        """
+        Queue a message for sending without waiting for the broker acknowledgement.
+        
+        The producer batches queued messages per linger_ms/max_batch_size. Every
+        KAFKA_BATCH_FLUSH_N sends, the pending acknowledgements are awaited so a
+        slow broker pushes back on the caller.
+        
+        Args:
+            topic: Topic to send to.
+            msg: Message value, serialized by json_serializer. bytes are taken to be
+                encoded JSON already and sent unchanged.
+        """
+        if self.producer is None:
+            await self.ensure_producer()
+        assert self.producer is not None
+        try:
+            # send() only appends to the producer's batch and returns the delivery future
+            self._pending_sends.append(await self.producer.send(topic, value=msg))
+        except Exception as e:
+            logger.exception('Kafka producer exception: %s', e)
+            raise Exception(e)
+        
+        if len(self._pending_sends) >= self.settings.KAFKA_BATCH_FLUSH_N:
+            await self.flush_pending()
+
+    async def drain_queue(self, queue: asyncio.Queue, topic: str) -> None:
+        """
+        Send every message put on a queue to a topic, until cancelled.
+        
+        Messages go through produce_msg, so sends are batched and flushed the same
+        way. FastMessage items are sent as their raw JSON bytes.
+        
+        Args:
+            queue: Queue to take messages from.
+            topic: Topic to send to.
+        """
+        try:
+            while True:
+                msg = await queue.get()
+                try:
+                    await self.produce_msg(topic, msg.raw if isinstance(msg, FastMessage) else msg)
+                except Exception:
+                    # produce_msg already logged it; drop the message and keep draining
+                    pass
+                finally:
+                    queue.task_done()
+        finally:
+            await self.flush_pending()
+
+    async def produce_msg_async(self, topic: str, msg: Union[Dict[str, Any], bytes]) -> asyncio.Future:
+        """
+        Queue a message for sending and return its delivery future.
+        
+        Unlike produce_msg, the future is handed to the caller instead of being
+        tracked here, so a caller publishing many messages can gather the
+        acknowledgements once at the end.
+        
+        Args:
+            topic: Topic to send to.
+            msg: Message value, serialized by json_serializer.
+            
+        Returns:
+            Future resolving to the record metadata once the broker acknowledges it.
+        """
+        if self.producer is None:
+            await self.ensure_producer()
+        assert self.producer is not None
+        return await self.producer.send(topic, value=msg)
+
+    async def flush_pending(self) -> None:
+        """Wait for every queued send to be acknowledged, logging failed deliveries."""
+        pending, self._pending_sends = self._pending_sends, deque()
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        failed = [result for result in results if isinstance(result, BaseException)]
+        if failed:
+            logger.error('%s of %s Kafka sends failed: %s', len(failed), len(results), failed[0])
+
+    async def produce_msg_sync(self, topic: str, msg: Dict[str, Any]) -> None:
+        """Send a message and wait until the broker acknowledges it."""
 
         await self.ensure_producer()
         assert self.producer is not None
         try:
-            logger.debug(f'Sending message.')
+            logger.debug('Sending message.')
             # Omit message key to use default round robin partitioning behavior
             result = await self.producer.send_and_wait(topic, value=msg)
             logger.debug(
-                f"Successfully sent message {msg['id']} to "
-                f"topic={result.topic}, "
-                f"partition={result.partition}, "
-                f"offset={result.offset}")
+                "Successfully sent message %s to topic=%s, partition=%s, offset=%s",
+                msg.get('id'), result.topic, result.partition, result.offset)
         except Exception as e:
-            logger.exception(f'Kafka producer exception: {e}')
+            logger.exception('Kafka producer exception: %s', e)
             raise Exception(e)
             
     async def consume_msg(self):
@@ -96,23 +195,33 @@ class KafkaClient:
         await self.ensure_consumer()
         assert self.consumer is not None
         try:
-            async for msg in self.consumer:
-                if self._consumer_closing:
-                    break
-                yield msg.value
-                await self.consumer.commit()
-                logger.info(f'Commited message: {msg}')
+            while not self._consumer_closing:
+                # Pull records in bulk and commit once per batch: each commit is a
+                # round trip to the group coordinator
+                records = await self.consumer.getmany(
+                    timeout_ms=1000, max_records=self.settings.KAFKA_MAX_POLL_RECORDS
+                )
+                count = 0
+                for messages in records.values():
+                    for msg in messages:
+                        yield msg.value
+                        count += 1
+                if count:
+                    await self.consumer.commit()
+                    logger.debug('Committed %d messages', count)
         except Exception as e:
-            logger.exception(f'Kafka consumer exception: {e}')
+            logger.exception('Kafka consumer exception: %s', e)
         
     async def close_producer(self):
         if self.producer:
             try:
                 logger.debug('Closing producer. . . .')
                 self._producer_closing = True
+                await self.flush_pending()
                 await self.producer.stop()
+                self._producer_started = False
             except Exception as e:
-                logger.exception(f'Exception while closing producer: {e}')
+                logger.exception('Exception while closing producer: %s', e)
 
     async def close_consumer(self):
         if self.consumer:
@@ -120,12 +229,13 @@ class KafkaClient:
                 logger.debug('Closing consumer. . . .')
                 self._consumer_closing = True
                 await self.consumer.stop()
+                self._consumer_started = False
             except Exception as e:
-                logger.exception(f'Exception while closing consumer: {e}')
+                logger.exception('Exception while closing consumer: %s', e)
 
     async def close(self):
-        await self.close_consumer()
-        await self.close_producer()
+        # Both close paths log their own errors; stop them concurrently
+        await asyncio.gather(self.close_consumer(), self.close_producer(), return_exceptions=True)
 
 
         
@@ -1,6 +1,8 @@
 import asyncio
 import json
 import logging
+from functools import lru_cache
+from typing import Any, Dict
 from app.models.jetstream_types import Record
 from app.core.logging import setup_local_logging
 from app.services.jetstream_client import JetstreamClient
@@ -10,15 +12,21 @@ setup_local_logging()
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def record_schema() -> Dict[str, Any]:
+    """Build the Record JSON schema once; pydantic walks the whole model tree for it."""
+    return Record.model_json_schema()
+
+
 def test_model():
-    print('Test Model')
+    logger.info('Test Model')
     test_data = {
         "$type": "app.bsky.feed.post",
         "createdAt": "2025-01-27T16:28:41.519Z",
         "text": "test"
     }
     record = Record.model_validate(test_data)
-    print(Record.model_json_schema())
+    logger.info("Record schema: %s", record_schema())
 
 async def test_connection():
 
@@ -34,14 +42,16 @@ async def test_connection():
     try:
         # Connect and start receiving messages
         async for message in jetstream_client.stream_messages():
-            logger.info(f"\nReceived message from: {message.did}")
-            #logger.info(message)
+            # Per-message logs are formatted only when DEBUG is enabled
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("Received message from: %s", message.did)
             if message.commit and message.commit.record:
-                logger.info(f"Collection: {message.commit.collection}")
-                logger.info(f"Operation: {message.commit.operation}")
-                print(f'Attempting to write {message.did}')
+                if debug:
+                    logger.debug("Collection: %s, operation: %s", message.commit.collection, message.commit.operation)
+                    logger.debug("Attempting to write %s", message.did)
                 kafka_message = {
-                    "id": f"{message.did}:{message.commit.collection}:{message.commit.rkey}",
+                    "id": ":".join((message.did, message.commit.collection, message.commit.rkey)),
                     "timestamp": message.time_us,
                     "did": message.did,
                     "operation": message.commit.operation,
@@ -50,10 +60,11 @@ async def test_connection():
                 }
                 await kafka_client.produce_msg('bsky-posts', kafka_message)
     except Exception as e:
-        logger.exception(f"Error during streaming: {e}")
+        logger.exception("Error during streaming: %s", e)
     finally:
-        # Always clean up
+        # Always clean up; closing the producer also flushes unacknowledged sends
         await jetstream_client.disconnect()
+        await kafka_client.close()
 
 if __name__ == "__main__":
     # test_model()
@@ -1,15 +1,19 @@
 import logging
 import asyncio
+from typing import Optional
 
 from app.services.jetstream_client import JetstreamClient
 from app.services.kafka_client import KafkaClient
-from app.models.jetstream_types import Message
+from app.models.jetstream_types import FastMessage
 
 logger = logging.getLogger(__name__)
 
 # Constants for Kafka topics
 TOPIC_JETSTREAM_RAW = "bluesky-jetstream-raw"
 
+# Messages buffered between the Jetstream reader and the Kafka writer
+INGEST_QUEUE_MAXSIZE = 10_000
+
 class IngestClient:
     """
     Client for ingesting data from the Bluesky Jetstream and pushing it to Kafka.
@@ -27,31 +31,34 @@ class IngestClient:
         self.jetstream_client = JetstreamClient()
         self.kafka_client = KafkaClient()
         self.running = False
+        self._reader_task: Optional[asyncio.Task] = None
 
-    async def process_message(self, message: Message) -> None:
+    async def process_message(self, message: FastMessage) -> None:
         """
         Process a message from the Jetstream and push it to Kafka.
         
         Args:
-            message: The Message object from Jetstream.
+            message: The FastMessage from Jetstream. Its raw JSON bytes are forwarded as is;
+                the persistence worker validates it when consuming.
         """
         try:
             # We use message.did as the key for consistent partitioning
             await self.kafka_client.produce_msg(
                 TOPIC_JETSTREAM_RAW,
-                message.model_dump()
+                message.raw
             )
             
-            # Log based on message type
-            if message.kind == "commit" and message.commit:
-                logger.debug(f"Processed commit: {message.commit.collection}/{message.commit.rkey}")
-            elif message.kind == "identity":
-                logger.info(f"Processed identity update for: {message.did}")
-            elif message.kind == "account":
-                logger.info(f"Processed account update for: {message.did}")
+            # Log based on message type, skipping the branch when DEBUG is off
+            if logger.isEnabledFor(logging.DEBUG):
+                if message.kind == "commit" and message.collection is not None:
+                    logger.debug("Processed commit: %s/%s", message.collection, message.rkey)
+                elif message.kind == "identity":
+                    logger.debug("Processed identity update for: %s", message.did)
+                elif message.kind == "account":
+                    logger.debug("Processed account update for: %s", message.did)
                 
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
+            logger.error("Error processing message: %s", e)
 
     async def stream_data(self) -> None:
         """
@@ -66,17 +73,26 @@ class IngestClient:
         # Ensure Kafka producer is ready
         await self.kafka_client.ensure_producer()
         
+        # Read Jetstream and write to Kafka in separate tasks joined by a bounded
+        # queue, so a slow broker round trip doesn't stall reading the websocket
+        queue: asyncio.Queue = asyncio.Queue(maxsize=INGEST_QUEUE_MAXSIZE)
+        # Ingest only forwards messages, so skip pydantic validation here
+        self._reader_task = asyncio.create_task(
+            self.jetstream_client.subscribe_to_queue(queue, fast=True)
+        )
+        writer_task = asyncio.create_task(
+            self.kafka_client.drain_queue(queue, TOPIC_JETSTREAM_RAW)
+        )
+        
         try:
-            # Process messages from Bluesky
-            async for message in self.jetstream_client.subscribe():
-                if not self.running:
-                    break
-                    
-                await self.process_message(message)
-                
+            await self._reader_task
+            # Send whatever the reader queued before it finished
+            await queue.join()
         except Exception as e:
-            logger.error(f"Error in Jetstream stream: {e}")
+            logger.error("Error in Jetstream stream: %s", e)
         finally:
+            writer_task.cancel()
+            await asyncio.gather(writer_task, return_exceptions=True)
             await self.stop()
             
     async def stop(self) -> None:
@@ -84,6 +100,8 @@ class IngestClient:
         Stop the ingest client.
         """
         self.running = False
+        if self._reader_task is not None and not self._reader_task.done():
+            self._reader_task.cancel()
         
         # Close connections
         await self.jetstream_client.close()
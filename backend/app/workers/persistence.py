@@ -7,23 +7,104 @@ This module provides a worker that:
 3. Persists them to PostgreSQL using the repository layer
 """
 
-import json
 import logging
 import asyncio
-from typing import Any, Dict, Optional
+import time
+import uuid
+import weakref
+from typing import Any, Dict, List, Optional, Tuple, Union
 from datetime import datetime, timezone
 
+from aiokafka import ConsumerRebalanceListener, TopicPartition
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_db, get_sessionmaker
+from app.models.db.bluesky import BlueskyUser
 from app.services.kafka_client import KafkaClient
-from app.models.jetstream_types import Message
-from app.repositories.bluesky import BlueskyUserRepository, BlueskyPostRepository, RawMessageRepository
+from app.models.jetstream_types import MESSAGE_ADAPTER, Message
+from app.repositories.bluesky import BlueskyUserRepository, BlueskyPostRepository, RawMessageRepository, UserRef
 
 logger = logging.getLogger(__name__)
 
 # Constants for Kafka topics
 TOPIC_JETSTREAM_RAW = "bluesky-jetstream-raw"
 
+# Sessions processing messages at the same time; kept below the engine's pool_size
+# so the batch session and API requests can still check out a connection
+MAX_CONCURRENT_SESSIONS = 16
+
+# getmany() wait when no records are buffered; kept short so a batch is picked up
+# as soon as it arrives instead of after a fixed one-second poll
+POLL_TIMEOUT_MS = 100
+
+# Offsets are committed once this many processed messages or seconds have accumulated,
+# instead of one OffsetCommit request per poll
+OFFSET_COMMIT_MAX_MESSAGES = 512
+OFFSET_COMMIT_INTERVAL_SECONDS = 5.0
+
+
+# Repositories per session, dropped with the session once it is garbage collected
+_REPOSITORY_CACHE: "weakref.WeakKeyDictionary[AsyncSession, Tuple[BlueskyUserRepository, BlueskyPostRepository, RawMessageRepository]]" = weakref.WeakKeyDictionary()
+
+
+def repositories_for(
+    session: AsyncSession,
+) -> Tuple[BlueskyUserRepository, BlueskyPostRepository, RawMessageRepository]:
+    """
+    Return the user, post and raw message repositories for a session, creating them on first use.
+    
+    Args:
+        session: Database session the repositories work on.
+        
+    Returns:
+        The (user, post, raw message) repositories bound to the session.
+    """
+    repositories = _REPOSITORY_CACHE.get(session)
+    if repositories is None:
+        repositories = (
+            BlueskyUserRepository(session),
+            BlueskyPostRepository(session),
+            RawMessageRepository(session),
+        )
+        _REPOSITORY_CACHE[session] = repositories
+    return repositories
+
+
+def parse_message(raw_data: Any) -> Optional[Message]:
+    """
+    Deserialize a raw Kafka message into a Message model.
+    
+    Plain function rather than a coroutine: validation never awaits, so the consumer
+    loop can parse a whole poll without creating a coroutine per message.
+    
+    Args:
+        raw_data: Raw bytes data from Kafka.
+        
+    Returns:
+        Deserialized Message object or None if deserialization fails.
+    """
+    try:
+        if isinstance(raw_data, (bytes, str)):
+            # Parse and validate the Kafka value in one pass, without a json.loads dict
+            return MESSAGE_ADAPTER.validate_json(raw_data)
+        return MESSAGE_ADAPTER.validate_python(raw_data)
+    except Exception as e:
+        logger.error("Error deserializing message: %s", e)
+        return None
+
+
+class CommitOnRevokeListener(ConsumerRebalanceListener):
+    """Commit the worker's processed offsets before its partitions are reassigned."""
+    
+    def __init__(self, worker: "PersistenceWorker") -> None:
+        self.worker = worker
+    
+    async def on_partitions_revoked(self, revoked) -> None:
+        # Whatever was processed but not committed would be redelivered to the new owner
+        await self.worker.commit_offsets()
+    
+    async def on_partitions_assigned(self, assigned) -> None:
+        pass
+
 
 class PersistenceWorker:
     """
@@ -40,6 +121,10 @@ class PersistenceWorker:
         self.kafka_client = KafkaClient()
         self.db_session_generator = get_db()
         self.running = False
+        # Next offset to commit per partition, for messages processed since the last commit
+        self._pending_offsets: Dict[TopicPartition, int] = {}
+        self._pending_count = 0
+        self._last_commit_time = time.monotonic()
     
     async def get_db_session(self) -> AsyncSession:
         """Get a database session from the generator."""
@@ -61,39 +146,51 @@ class PersistenceWorker:
         Returns:
             Deserialized Message object or None if deserialization fails.
         """
-        try:
-            if isinstance(raw_data, bytes):
-                data = json.loads(raw_data.decode('utf-8'))
-            else:
-                data = raw_data
-                
-            return Message.model_validate(data)
-        except Exception as e:
-            logger.error(f"Error deserializing message: {e}")
-            return None
+        return parse_message(raw_data)
     
-    async def process_message(self, message: Message, session: AsyncSession) -> None:
+    async def process_message(
+        self,
+        message: Message,
+        session: AsyncSession,
+        users: Optional[Dict[str, UserRef]] = None,
+        raw_message_id: Optional[uuid.UUID] = None,
+        commit: bool = True,
+    ) -> None:
         """
         Process a Bluesky Jetstream message and persist it to PostgreSQL.
         
         Args:
             message: Deserialized Message object.
             session: Database session for persistence.
+            users: Authors already resolved for the current batch, keyed by DID.
+                Users created while processing are added to it.
+            raw_message_id: Id of the already archived RawMessage row. The caller
+                flags it processed. When omitted the raw message is stored, already
+                flagged processed, as part of this message's transaction.
+            commit: Commit the session once the message is processed. When False the
+                message's writes are left in the session's open transaction, and a
+                failure only rolls back to the savepoint taken for this message.
         """
-        raw_message = None
+        if users is None:
+            users = {}
         raw_repo = None
+        savepoint = None
+        
+        stored_here = raw_message_id is None
+        # Whether this message resolved its author into users, inside its own savepoint
+        user_added = False
         
         try:
-            # Create repositories with the session
-            user_repo = BlueskyUserRepository(session)
-            post_repo = BlueskyPostRepository(session)
-            raw_repo = RawMessageRepository(session)
-            
-            # Store the raw message first
-            raw_message = await raw_repo.store_raw_message(message)
+            # Messages sharing a session share its repositories
+            user_repo, post_repo, raw_repo = repositories_for(session)
             
             # Create a savepoint to allow partial rollback if needed
-            await session.begin_nested()
+            savepoint = await session.begin_nested()
+            
+            # Store the raw message first, unless the batch already archived it. It is
+            # stored as processed: it commits or rolls back together with the processing
+            if stored_here:
+                await raw_repo.store_raw_message(message, processed=True)
             
             # Process based on message kind
             if message.kind == "identity" and message.identity:
@@ -106,53 +203,134 @@ class PersistenceWorker:
                 
             elif message.kind == "commit" and message.commit:
                 # Process post/content commit
-                # Get or create the user with a single operation
-                user, created = await user_repo.get_or_create(
-                    defaults={
-                        "handle": f"unknown-{message.did[-8:]}",  # Temporary handle
-                        "seq": 0,
-                        "bsky_timestamp": datetime.now(timezone.utc),
-                        "active": True
-                    },
-                    did=message.did
-                )
-                
-                if created:
-                    logger.info(f"Created placeholder user for DID: {message.did}")
+                # Authors are usually resolved up front for the whole batch
+                user: Optional[Union[BlueskyUser, UserRef]] = users.get(message.did)
+                if user is None:
+                    user, created = await user_repo.get_or_create(
+                        defaults={
+                            "handle": f"unknown-{message.did[-8:]}",  # Temporary handle
+                            "seq": 0,
+                            "bsky_timestamp": datetime.now(timezone.utc),
+                            "active": True
+                        },
+                        did=message.did
+                    )
+                    users[message.did] = UserRef(user.id, user.did)
+                    user_added = True
+                    
+                    if created:
+                        logger.debug("Created placeholder user for DID: %s", message.did)
                 
                 # Process the post
                 await post_repo.process_post_commit(message.commit, user)
             
-            # Mark the raw message as processed
-            if raw_message:
-                message_id = str(raw_message.id)
-                await raw_repo.mark_as_processed(message_id)
-            
-            # Commit the transaction
-            await session.commit()
+            # Release the savepoint, and commit unless the caller batches commits
+            await savepoint.commit()
+            if commit:
+                await session.commit()
             
         except Exception as e:
-            logger.error(f"Error processing message: {str(e)}", exc_info=True)
-            await session.rollback()
+            logger.error("Error processing message: %s", e, exc_info=True)
+            if commit:
+                await session.rollback()
+            elif savepoint is None:
+                # No savepoint to fall back to: fail the caller's transaction as a whole,
+                # so its raw rows aren't flagged processed
+                raise
+            else:
+                # Keep the earlier messages of the caller's transaction
+                await savepoint.rollback()
+            # users is shared by every author of the batch; only the entry this message
+            # added was rolled back, the other authors' entries are still valid
+            if user_added:
+                users.pop(message.did, None)
             
-            # Mark the message as processed but with error flag
+            # The error is logged above; the raw message is still archived as processed,
+            # so it isn't picked up again. In a batched transaction the caller flags it
+            if not commit or raw_repo is None:
+                return
             try:
-                if raw_message and raw_repo:
-                    # Include error information for debugging
-                    error_data = {
-                        "processed": True,
-                        "additional_data": {
-                            "processing_error": str(e),
-                            "error_time": datetime.now(timezone.utc).isoformat()
-                        }
-                    }
-                    await raw_repo.update(str(raw_message.id), error_data)
-                    await session.commit()
-                    logger.debug(f"Marked message as processed with error: {str(raw_message.id)}")
+                if stored_here:
+                    # The rollback discarded the row stored with the message
+                    await raw_repo.store_raw_message(message, processed=True)
+                else:
+                    await raw_repo.mark_as_processed(str(raw_message_id))
+                await session.commit()
+                logger.debug("Archived failed message %s as processed", message.did)
             except Exception as e2:
-                logger.error(f"Failed to mark message with error: {str(e2)}")
+                logger.error("Failed to archive failed message: %s", e2)
                 # Don't re-raise to continue processing
     
+    async def process_author_messages(
+        self,
+        messages: List[tuple[Message, uuid.UUID]],
+        users: Dict[str, UserRef],
+        limit: asyncio.Semaphore,
+    ) -> None:
+        """
+        Process one author's messages in order on a dedicated session.
+        
+        Each message runs in its own savepoint and the session commits once at the
+        end, instead of one commit round-trip per message. The archived RawMessage
+        rows are flagged processed in that same transaction, so if it never commits
+        they stay unprocessed.
+        
+        Args:
+            messages: The author's messages paired with their RawMessage ids, in stream order.
+            users: Authors already resolved for the current batch, keyed by DID.
+            limit: Semaphore bounding the number of sessions open at once.
+        """
+        async with limit:
+            async with get_sessionmaker()() as session:
+                for message, raw_message_id in messages:
+                    await self.process_message(message, session, users, raw_message_id, commit=False)
+                # Failed messages are flagged too; their errors are logged by process_message
+                _, _, raw_repo = repositories_for(session)
+                await raw_repo.mark_many_processed([raw_message_id for _, raw_message_id in messages])
+                await session.commit()
+    
+    async def commit_offsets(self) -> None:
+        """Commit the offsets of every message processed since the last commit."""
+        if not self._pending_offsets or self.kafka_client.consumer is None:
+            return
+        offsets, self._pending_offsets = self._pending_offsets, {}
+        self._pending_count = 0
+        self._last_commit_time = time.monotonic()
+        await self.kafka_client.consumer.commit(offsets)
+        logger.debug("Committed offsets for %d partitions", len(offsets))
+    
+    async def rewind_poll(self, positions: Dict[TopicPartition, int], raw_ids: List[uuid.UUID]) -> None:
+        """
+        Seek back to the start of a poll that failed, so Kafka redelivers it.
+        
+        The consumer position is already past the poll, and the next successful poll
+        would commit later offsets, skipping it for good. Every raw row the poll archived
+        is deleted first, including those of authors whose transaction committed before
+        the failure, so the redelivery archives each message once instead of leaving
+        duplicates for claim_batch.
+        
+        Args:
+            positions: First offset of the poll per partition.
+            raw_ids: Ids of the RawMessage rows the poll archived.
+        """
+        if raw_ids:
+            try:
+                async with get_sessionmaker()() as session:
+                    _, _, raw_repo = repositories_for(session)
+                    await raw_repo.delete_many(raw_ids)
+                    await session.commit()
+            except Exception as e:
+                logger.error("Failed to discard raw messages of the failed poll: %s", e)
+        
+        consumer = self.kafka_client.consumer
+        assert consumer is not None
+        # Partitions revoked since the poll are redelivered to their new owner anyway
+        assigned = consumer.assignment()
+        for tp, offset in positions.items():
+            if tp in assigned:
+                consumer.seek(tp, offset)
+        logger.warning("Rewound %d partitions to redeliver the failed poll", len(positions))
+    
     async def run(self):
         """
         Run the worker to consume messages from Kafka and persist to PostgreSQL.
@@ -169,9 +347,9 @@ class PersistenceWorker:
             # Subscribe to the Jetstream raw topic
             assert self.kafka_client.consumer is not None
             await self.kafka_client.consumer.start()
-            self.kafka_client.consumer.subscribe([TOPIC_JETSTREAM_RAW])
+            self.kafka_client.consumer.subscribe([TOPIC_JETSTREAM_RAW], listener=CommitOnRevokeListener(self))
             
-            logger.info(f"Subscribed to Kafka topic: {TOPIC_JETSTREAM_RAW}")
+            logger.info("Subscribed to Kafka topic: %s", TOPIC_JETSTREAM_RAW)
             
             # Add circuit breaker pattern
             consecutive_errors = 0
@@ -179,63 +357,126 @@ class PersistenceWorker:
             backoff_time = 1               # Start with 1 second
             max_backoff_time = 60          # Max 1 minute backoff
             messages_processed = 0
-            last_stats_time = datetime.now(timezone.utc)
+            last_stats_time = time.monotonic()
+            
+            # First offset per partition and archived raw rows of the poll in progress,
+            # for rewinding it if processing fails
+            poll_start: Dict[TopicPartition, int] = {}
+            poll_raw_ids: List[uuid.UUID] = []
             
             while self.running:
                 try:
-                    # Get DB session for this batch
-                    session = await self.get_db_session()
-                    
-                    # Get records from Kafka with timeout
-                    records = await self.kafka_client.consumer.getmany(timeout_ms=1000)
+                    # Get records from Kafka. The short timeout returns as soon as records
+                    # arrive; under load each poll fills up to max_records instead
+                    records = await self.kafka_client.consumer.getmany(
+                        timeout_ms=POLL_TIMEOUT_MS,
+                        max_records=self.kafka_client.settings.KAFKA_MAX_POLL_RECORDS,
+                    )
                     
                     if not records:
                         # Reset error counter on successful poll with no errors
                         if consecutive_errors > 0:
                             consecutive_errors = max(0, consecutive_errors - 1)  # Graceful reduction
                             backoff_time = max(1, backoff_time // 2)  # Reduce backoff time
+                        # Don't hold processed offsets back while the topic is idle
+                        if time.monotonic() - self._last_commit_time >= OFFSET_COMMIT_INTERVAL_SECONDS:
+                            await self.commit_offsets()
                         continue
             
                     batch_size = sum(len(messages) for _, messages in records.items())
+                    poll_start = {tp: messages[0].offset for tp, messages in records.items()}
                     
-                    # Process each partition's records
+                    # Deserialize the whole poll first so authors can be resolved together
+                    batch: Dict[Any, List[Message]] = {}
                     for tp, messages in records.items():
-                        logger.info(f"Processing {len(messages)} messages from {tp.topic}:{tp.partition}")
+                        parsed = (parse_message(msg.value) for msg in messages)
+                        batch[tp] = [message for message in parsed if message is not None]
+                    
+                    all_messages = [message for messages in batch.values() for message in messages]
+                    
+                    # Only polls that returned records open a session for the batch
+                    async with get_sessionmaker()() as session:
+                        # Archive the whole poll with one COPY. Rows are flagged processed by
+                        # each author's transaction, so a failure leaves them unprocessed
+                        user_repo, _, raw_repo = repositories_for(session)
+                        poll_raw_ids = await raw_repo.copy_raw_messages(all_messages)
+                        raw_ids = iter(poll_raw_ids)
+                        
+                        # Resolve every commit author in the batch with one query, and create
+                        # the unknown ones with one more, instead of one get_or_create per message
+                        authors = {message.did for message in all_messages if message.kind == "commit"}
+                        users = await user_repo.resolve_dids(list(authors))
+                        if len(users) < len(authors):
+                            users.update(await user_repo.create_placeholders([did for did in authors if did not in users]))
                         
-                        for msg in messages:
-                            # Deserialize and process
-                            message = await self.deserialize_message(msg.value)
-                            if message:
-                                await self.process_message(message, session)
-                                messages_processed += 1
+                        # Commit up front, so a failing message can't roll back the raw rows
+                        # or placeholder users the others rely on
+                        await session.commit()
                     
-                    # Commit offsets
-                    await self.kafka_client.consumer.commit()
+                    # Group by author: one author's messages must apply in order (a post
+                    # before its delete, a placeholder user before its posts), while
+                    # different authors touch different rows and can run concurrently
+                    by_author: Dict[str, List[tuple[Message, uuid.UUID]]] = {}
+                    for tp, messages in batch.items():
+                        logger.debug("Processing %d messages from %s:%s", len(messages), tp.topic, tp.partition)
+                        for message in messages:
+                            by_author.setdefault(message.did, []).append((message, next(raw_ids)))
+                    
+                    # Each author gets its own session, since one session can only run
+                    # one statement at a time
+                    limit = asyncio.Semaphore(MAX_CONCURRENT_SESSIONS)
+                    async with asyncio.TaskGroup() as tg:
+                        for author_messages in by_author.values():
+                            tg.create_task(self.process_author_messages(author_messages, users, limit))
+                    messages_processed += len(all_messages)
+                    
+                    # Record the processed offsets and commit them once enough have built up
+                    for tp, messages in records.items():
+                        self._pending_offsets[tp] = messages[-1].offset + 1
+                    self._pending_count += batch_size
+                    poll_start, poll_raw_ids = {}, []
+                    if (
+                        self._pending_count >= OFFSET_COMMIT_MAX_MESSAGES
+                        or time.monotonic() - self._last_commit_time >= OFFSET_COMMIT_INTERVAL_SECONDS
+                    ):
+                        await self.commit_offsets()
                     
                     # Reset circuit breaker on successful processing
                     consecutive_errors = 0
                     backoff_time = 1
                     
                     # Log stats periodically
-                    now = datetime.now(timezone.utc)
-                    if (now - last_stats_time).total_seconds() >= 60:  # Every minute
-                        logger.info(f"Persistence stats: processed {messages_processed} messages in the last minute")
+                    now = time.monotonic()
+                    if now - last_stats_time >= 60:  # Every minute
+                        logger.info("Persistence stats: processed %s messages in the last minute", messages_processed)
                         messages_processed = 0
                         last_stats_time = now
                 
                 except Exception as e:
                     consecutive_errors += 1
-                    logger.error(f"Error in consumer loop ({consecutive_errors}/{max_consecutive_errors}): {str(e)}", exc_info=True)
+                    logger.error("Error in consumer loop (%s/%s): %s", consecutive_errors, max_consecutive_errors, e, exc_info=True)
+                    
+                    # Redeliver the failed poll instead of moving on past it
+                    if poll_start:
+                        try:
+                            await self.rewind_poll(poll_start, poll_raw_ids)
+                        except Exception as e2:
+                            logger.error("Failed to rewind the failed poll: %s", e2)
+                        poll_start, poll_raw_ids = {}, []
                     
                     if consecutive_errors >= max_consecutive_errors:
                         # Circuit breaker pattern - back off exponentially
                         backoff_time = min(backoff_time * 2, max_backoff_time)
-                        logger.warning(f"Circuit breaker triggered: backing off for {backoff_time} seconds")
+                        logger.warning("Circuit breaker triggered: backing off for %s seconds", backoff_time)
                         
                     await asyncio.sleep(backoff_time)  # Backoff with exponential increase
         
         finally:
-            # Clean up
+            # Clean up, committing what was processed since the last commit
+            try:
+                await self.commit_offsets()
+            except Exception as e:
+                logger.error("Failed to commit offsets on shutdown: %s", e)
             await self.kafka_client.close_consumer()
             logger.info("Persistence worker stopped")
     
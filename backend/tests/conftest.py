@@ -4,8 +4,11 @@ import pytest_asyncio
 import asyncio
 import logging
 import os
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Generator
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from testcontainers.kafka import KafkaContainer
+from testcontainers.postgres import PostgresContainer
 
 # Set test environment variables before importing app configs
 os.environ.update({
@@ -16,8 +19,8 @@ os.environ.update({
     "POSTGRES_DB": "test_db",
     "ENVIRONMENT": "test",
     "KAFKA_BATCH_SIZE": "16384",
-    "KAFKA_LINGER_MS": "0",
-    "KAFKA_MAX_POLL_RECORDS": "100",
+    "KAFKA_LINGER_MS": "5",
+    "KAFKA_MAX_POLL_RECORDS": "1000",
     "KAFKA_GROUP_ID_BSKY": "test-group",
     "KAFKA_AWS_REGION": "us-east-1",
     "KAFKA_MSK_CLUSTER_ARN": "",
@@ -27,6 +30,10 @@ os.environ.update({
 
 
 from app.core.config import KafkaSettings
+from app.core.db_base import Base
+# Registers the tables on Base.metadata
+from app.models.db import bluesky  # noqa: F401
+from app.repositories import bluesky as bluesky_repositories
 from app.services.kafka_client import KafkaClient
 
 logger = logging.getLogger(__name__)
@@ -43,26 +50,63 @@ async def kafka_container() -> AsyncGenerator[KafkaContainer, None]:
     topics = ['bsky-posts', 'bsky-actors']
     for topic in topics:
         container.with_command(f'/opt/bitnami/kafka/bin/kafka-topics.sh --bootstrap-server localhost:9092 --create --if-not-exists --topic {topic} --replication-factor 1 --partitions 1')
-        logger.info(f"Created topic: {topic}")    
+        logger.info("Created topic: %s", topic)    
     yield container
     container.stop()
 
-@pytest_asyncio.fixture
+@pytest_asyncio.fixture(scope="session")
 async def kafka_client(kafka_container) -> AsyncGenerator[KafkaClient, None]:
-    """Create a KafkaClient configured for testing"""
+    """Create a KafkaClient configured for testing, shared by every test so connections are reused"""
     bootstrap_servers = kafka_container.get_bootstrap_server()
-    logger.info(f"Bootstrap servers from container: {bootstrap_servers}")
+    logger.info("Bootstrap servers from container: %s", bootstrap_servers)
     
     settings = KafkaSettings(
         KAFKA_BOOTSTRAP_SERVERS=bootstrap_servers,
         KAFKA_BATCH_SIZE=16384,
-        KAFKA_LINGER_MS=0,
-        KAFKA_MAX_POLL_RECORDS=100,
+        # Let concurrent sends share a batch, compressed as in production
+        KAFKA_LINGER_MS=5,
+        KAFKA_COMPRESSION_TYPE="lz4",
+        KAFKA_ACKS=1,
+        KAFKA_MAX_POLL_RECORDS=1000,
         KAFKA_GROUP_ID_BSKY="test-group"
     )
-    logger.info(f"Created settings with bootstrap servers: {settings.KAFKA_BOOTSTRAP_SERVERS}")
+    logger.info("Created settings with bootstrap servers: %s", settings.KAFKA_BOOTSTRAP_SERVERS)
     
     client = KafkaClient(settings=settings)
-    logger.info(f"Created client with settings: {client.settings.model_dump_json()}")
+    logger.info("Created client with settings: %s", client.settings.model_dump_json())
     yield client
-    await client.close()
\ No newline at end of file
+    await client.close()
+
+
+@pytest.fixture(scope="session")
+def postgres_container() -> Generator[PostgresContainer, None, None]:
+    """Create a PostgreSQL container for testing, shared by every test"""
+    container = PostgresContainer("postgres:16-alpine", driver="asyncpg")
+    container.start()
+    yield container
+    container.stop()
+
+@pytest_asyncio.fixture
+async def db_engine(postgres_container) -> AsyncGenerator[AsyncEngine, None]:
+    """Create the schema on a fresh engine and drop it again after the test"""
+    # NullPool: connections must not outlive the test's event loop
+    engine = create_async_engine(postgres_container.get_connection_url(), poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # Cached users would outlive the rows they point to
+    bluesky_repositories._user_cache.clear()
+    yield engine
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+@pytest.fixture
+def db_sessionmaker(db_engine) -> async_sessionmaker[AsyncSession]:
+    """Session factory configured like app.core.database.get_sessionmaker"""
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+@pytest_asyncio.fixture
+async def db_session(db_sessionmaker) -> AsyncGenerator[AsyncSession, None]:
+    """A session on the test database"""
+    async with db_sessionmaker() as session:
+        yield session
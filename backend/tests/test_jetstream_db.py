@@ -11,11 +11,12 @@ This script tests that our PostgreSQL code changes work properly by:
 import asyncio
 import argparse
 import logging
+import sys
 import time
-from datetime import datetime
-from typing import Any, Optional, List, Callable, Awaitable, Sequence, Tuple
+from typing import Any, Optional, List, Callable, Awaitable, Sequence
 
-from sqlalchemy import Result, Select
+from sqlalchemy import bindparam, func, literal, select, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.logging import setup_local_logging
@@ -23,7 +24,7 @@ from app.core.database import AsyncSessionLocal
 from app.db.init_db import create_tables
 
 # Import your existing clients and repositories
-from app.models.db.bluesky import RawMessage
+from app.models.db.bluesky import BlueskyPost, BlueskyUser, RawMessage
 from app.services.jetstream_client import JetstreamClient
 from app.repositories.bluesky import BlueskyUserRepository, BlueskyPostRepository, RawMessageRepository
 from app.models.jetstream_types import Message, Commit, Identity, Account
@@ -32,15 +33,99 @@ from app.models.jetstream_types import Message, Commit, Identity, Account
 setup_local_logging()
 logger = logging.getLogger("jetstream_db_test")
 
+# Messages written per transaction; PostgreSQL batch inserts stop getting faster past a few hundred rows
+BATCH_SIZE = 500
+
+# Report queries, built once so every status check reuses the same statement objects
+# and hits SQLAlchemy's compiled cache without rebuilding the construct each call.
+# Exact table counts in one row, as scalar subqueries of a single statement; each
+# count(*) scans its whole table, so these are only used with --exact
+_COUNTS_QUERY = select(
+    select(func.count()).select_from(BlueskyUser).scalar_subquery().label("users"),
+    select(func.count()).select_from(BlueskyPost).scalar_subquery().label("posts"),
+    select(func.count()).select_from(RawMessage).scalar_subquery().label("raw"),
+)
+# Planner row estimates from pg_class: a catalog lookup instead of a scan. reltuples
+# is -1 for a table that has never been vacuumed or analyzed, reported as 0
+_ESTIMATED_COUNTS_QUERY = text(
+    "SELECT " + ", ".join(
+        f"(SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = '{table}'::regclass) AS {label}"
+        for label, table in (
+            ("users", BlueskyUser.__tablename__),
+            ("posts", BlueskyPost.__tablename__),
+            ("raw", RawMessage.__tablename__),
+        )
+    )
+)
+# The most recent users and posts in one round-trip, told apart by the kind column
+_RECENT_SAMPLES_QUERY = union_all(
+    select(literal("user").label("kind"), BlueskyUser.did.label("ref"), BlueskyUser.handle.label("detail"))
+    .order_by(BlueskyUser.created_at.desc())
+    .limit(3),
+    select(literal("post").label("kind"), BlueskyPost.uri.label("ref"), BlueskyPost.text.label("detail"))
+    .order_by(BlueskyPost.created_at.desc())
+    .limit(3),
+)
+# Kind/collection/operation counts over the most recent raw messages, aggregated by
+# PostgreSQL; only the JSONB fields being counted leave the server, never raw_data itself
+_RECENT_RAW = (
+    select(
+        RawMessage.kind,
+        RawMessage.raw_data["commit"]["collection"].astext.label("collection"),
+        RawMessage.raw_data["commit"]["operation"].astext.label("operation"),
+    )
+    .order_by(RawMessage.time_us.desc())
+    .limit(bindparam("limit"))
+    .subquery()
+)
+_RAW_SUMMARY_QUERY = (
+    select(_RECENT_RAW.c.kind, _RECENT_RAW.c.collection, _RECENT_RAW.c.operation, func.count().label("count"))
+    .group_by(_RECENT_RAW.c.kind, _RECENT_RAW.c.collection, _RECENT_RAW.c.operation)
+    .order_by(func.count().desc())
+)
+
+# Commits outside this NSID prefix are not stored by the test
+FEED_COLLECTION_PREFIX = "app.bsky.feed."
+
+# Seconds between statistics reports while the test runs
+STATS_INTERVAL_SECONDS = 5
+
+# Most messages taken from the Jetstream client per process_batch call
+SUBSCRIBE_BATCH_SIZE = 64
+
+# Concurrent batch writers, each with its own session, and how many batches may wait for one
+WRITER_COUNT = 8
+WRITE_QUEUE_SIZE = 16
+
+# A partial batch is written once it is this old, bounding how long messages wait in the buffer
+FLUSH_INTERVAL_SECONDS = 0.1
+
 class JetstreamDbTest:
     """Test the Jetstream-to-PostgreSQL data flow using existing clients."""
     
-    def __init__(self, message_limit: Optional[int] = 100):
-        """Initialize the test with a specified message limit."""
+    def __init__(
+        self,
+        message_limit: Optional[int] = 100,
+        batch_size: int = BATCH_SIZE,
+        exact_counts: bool = False,
+        writers: int = WRITER_COUNT,
+    ):
+        """Initialize the test with a specified message limit, write batch size and writer count."""
         self.message_limit = message_limit
+        self.batch_size = batch_size
+        self.writers = writers
+        # Count rows with count(*) instead of reading the planner's estimates
+        self.exact_counts = exact_counts
         self.message_count = 0
         self.start_time = None
         self.jetstream_client = None
+        # Messages waiting to be written by the next flush
+        self._buffer: List[Message] = []
+        self._last_flush = time.monotonic()
+        # Messages handed off for writing, counted toward the limit before they are written
+        self._submitted = 0
+        # Batches waiting for a writer; only set while run() is streaming
+        self._write_queue: Optional[asyncio.Queue] = None
         
         # Stats for tracking
         self.stats = {
@@ -50,6 +135,7 @@ class JetstreamDbTest:
             "posts_created": 0,
             "posts_updated": 0,
             "posts_deleted": 0,
+            "commits_skipped": 0,
             "errors": 0
         }
     
@@ -64,226 +150,228 @@ class JetstreamDbTest:
         elapsed = time.time() - self.start_time if self.start_time else 0
         msgs_per_sec = self.stats["messages_processed"] / elapsed if elapsed > 0 else 0
         
-        print("\n--- Jetstream DB Test Statistics ---")
-        print(f"Running for: {elapsed:.1f} seconds")
-        print(f"Messages processed: {self.stats['messages_processed']} ({msgs_per_sec:.1f}/sec)")
-        print(f"Users: {self.stats['users_created']} created, {self.stats['users_updated']} updated")
-        print(f"Posts: {self.stats['posts_created']} created, {self.stats['posts_updated']} updated, {self.stats['posts_deleted']} deleted")
-        print(f"Errors: {self.stats['errors']}")
-        print("------------------------------------\n")
+        # One write and one flush for the whole report
+        sys.stdout.write(
+            "\n--- Jetstream DB Test Statistics ---\n"
+            f"Running for: {elapsed:.1f} seconds\n"
+            f"Messages processed: {self.stats['messages_processed']} ({msgs_per_sec:.1f}/sec)\n"
+            f"Users: {self.stats['users_created']} created, {self.stats['users_updated']} updated\n"
+            f"Posts: {self.stats['posts_created']} created, {self.stats['posts_updated']} updated, {self.stats['posts_deleted']} deleted\n"
+            f"Non-feed commits skipped: {self.stats['commits_skipped']}\n"
+            f"Errors: {self.stats['errors']}\n"
+            "------------------------------------\n\n"
+        )
+        sys.stdout.flush()
+    
+    async def _stats_printer(self) -> None:
+        """Print statistics every STATS_INTERVAL_SECONDS until cancelled."""
+        while True:
+            await asyncio.sleep(STATS_INTERVAL_SECONDS)
+            await self.print_stats()
     
     async def examine_raw_messages(self, limit: int = 5):
-        """Examine a sample of raw messages to see what they contain."""
+        """Summarize the most recent raw messages by kind, collection and operation."""
         async with AsyncSessionLocal() as session:
             try:
-                # Get some unprocessed raw messages
-                from sqlalchemy import select
-                from app.models.db.bluesky import RawMessage
-                from app.models.jetstream_types import Message
-                
-                raw_query: Select[Tuple[RawMessage]] = select(RawMessage).order_by(RawMessage.time_us.desc()).limit(limit)
-                raw_result: Result[Tuple[RawMessage]] = await session.execute(raw_query)
-                raw_messages: Sequence[RawMessage] = raw_result.scalars().all()
-                
-                if not raw_messages:
+                result = await session.execute(_RAW_SUMMARY_QUERY, {"limit": limit})
+                rows = result.all()
+
+                if not rows:
                     logger.info("No raw messages found to examine")
                     return
-                
-                logger.info(f"Examining {len(raw_messages)} raw messages:")
-                
-                for raw in raw_messages:
-                    logger.info(f"Message {raw.id} - Kind: {raw.kind} - DID: {raw.did}")
-                    
-                    # Try to parse as a Message
-                    try:
-                        # Extract useful data
-                        if raw.kind == "identity":
-                            if 'identity' in raw.raw_data:
-                                identity_data = raw.raw_data['identity']
-                                logger.info(f"  Identity: handle={identity_data.get('handle')}, seq={identity_data.get('seq')}")
-                            else:
-                                logger.warning("  No identity data found in identity message")
-                                
-                        elif raw.kind == "commit":
-                            if 'commit' in raw.raw_data:
-                                commit_data = raw.raw_data['commit']
-                                collection = commit_data.get('collection', '')
-                                operation = commit_data.get('operation', '')
-                                logger.info(f"  Commit: collection={collection}, operation={operation}")
-                                
-                                # Check if it has a record
-                                if 'record' in commit_data:
-                                    record_data = commit_data['record']
-                                    if isinstance(record_data, dict):
-                                        record_type = record_data.get('$type', record_data.get('record_type', 'unknown'))
-                                        text = record_data.get('text', '')[:50]
-                                        if text:
-                                            text = text + '...' if len(text) >= 50 else text
-                                        logger.info(f"  Record: type={record_type}, text={text}")
-                            else:
-                                logger.warning("  No commit data found in commit message")
-                    except Exception as e:
-                        logger.error(f"  Error examining raw message: {e}")
+
+                logger.info("Examining %s raw messages:", sum(row.count for row in rows))
+                for row in rows:
+                    if row.kind == "commit":
+                        logger.info("  %s x commit: collection=%s, operation=%s", row.count, row.collection, row.operation)
+                    else:
+                        logger.info("  %s x %s", row.count, row.kind)
             except Exception as e:
-                logger.error(f"Error examining raw messages: {e}")
+                logger.error("Error examining raw messages: %s", e)
     
     async def check_database_stats(self):
         """Query the database to check record counts."""
         async with AsyncSessionLocal() as session:
             try:
-                # Create repositories
-                user_repo = BlueskyUserRepository(session)
-                post_repo = BlueskyPostRepository(session)
-                raw_repo = RawMessageRepository(session)
+                # Get all counts in one round-trip, estimated unless exact counts were asked for
+                counts = (await session.execute(_COUNTS_QUERY if self.exact_counts else _ESTIMATED_COUNTS_QUERY)).one()
+                about = "" if self.exact_counts else "about "
                 
-                # Get counts using the ORM
-                from sqlalchemy import func, select
-                from app.models.db.bluesky import BlueskyUser, BlueskyPost, RawMessage
+                print(f"\nDatabase contains {about}{counts.users or 0} users, {counts.posts or 0} posts, and {counts.raw or 0} raw messages")
                 
-                user_query = select(func.count()).select_from(BlueskyUser)
-                post_query = select(func.count()).select_from(BlueskyPost)
-                raw_query = select(func.count()).select_from(RawMessage)
-                
-                user_result = await session.execute(user_query)
-                post_result = await session.execute(post_query)
-                raw_result = await session.execute(raw_query)
-                
-                total_users = user_result.scalar() or 0
-                total_posts = post_result.scalar() or 0
-                total_raw = raw_result.scalar() or 0
-                
-                print(f"\nDatabase contains {total_users} users, {total_posts} posts, and {total_raw} raw messages")
-                
-                # Get some recent users
-                recent_users_query = (
-                    select(BlueskyUser.id, BlueskyUser.did, BlueskyUser.handle)
-                    .order_by(BlueskyUser.created_at.desc())
-                    .limit(3)
-                )
-                recent_users_result = await session.execute(recent_users_query)
-                recent_users = recent_users_result.fetchall()
-                
-                # Get some recent posts
-                recent_posts_query = (
-                    select(BlueskyPost.id, BlueskyPost.uri, BlueskyPost.text)
-                    .order_by(BlueskyPost.created_at.desc())
-                    .limit(3)
-                )
-                recent_posts_result = await session.execute(recent_posts_query)
-                recent_posts = recent_posts_result.fetchall()
+                # Get some recent users and posts in one more
+                samples = (await session.execute(_RECENT_SAMPLES_QUERY)).fetchall()
+                recent_users = [row for row in samples if row.kind == "user"]
+                recent_posts = [row for row in samples if row.kind == "post"]
                 
                 # Display samples
                 if recent_users:
                     print("\nRecent users:")
                     for user in recent_users:
-                        print(f"  - {user.handle} (DID: {user.did[:15]}...)")
+                        print(f"  - {user.detail} (DID: {user.ref[:15]}...)")
                 
                 if recent_posts:
                     print("\nRecent posts:")
                     for post in recent_posts:
-                        text = post.text[:50] + "..." if post.text and len(post.text) > 50 else post.text
+                        text = post.detail[:50] + "..." if post.detail and len(post.detail) > 50 else post.detail
                         print(f"  - {text or '[No text]'}")
             except Exception as e:
-                logger.error(f"Error checking database stats: {e}")
+                logger.error("Error checking database stats: %s", e)
                 self.stats["errors"] += 1
     
-    async def process_message(self, message: Message):
-        """Process a single message using the repositories."""
+    async def process_message(self, message: Message) -> bool:
+        """
+        Buffer a message, writing the buffer to the database once it is full.
+        
+        Returns:
+            True once the message limit is reached and the test should stop.
+        """
+        return await self.process_batch((message,))
+    
+    async def process_batch(self, messages: Sequence[Message]) -> bool:
+        """
+        Buffer a batch of messages, checking once afterwards whether to write the buffer.
+        
+        Returns:
+            True once the message limit is reached and the test should stop.
+        """
+        limit_reached = False
+        # Bound once per batch instead of looked up per message
+        startswith = str.startswith
+        prefix = FEED_COLLECTION_PREFIX
+        for message in messages:
+            # Only feed commits are stored; drop the rest before they reach the buffer
+            commit = message.commit
+            if message.kind == "commit" and commit and not (
+                (collection := commit.collection) and startswith(collection, prefix)
+            ):
+                self.stats["commits_skipped"] += 1
+                continue
+            
+            self._buffer.append(message)
+            pending = self._submitted + len(self._buffer)
+            if self.message_limit and pending >= self.message_limit:
+                # Messages past the limit are dropped with the rest of the batch
+                limit_reached = True
+                break
+        
+        if (
+            len(self._buffer) >= self.batch_size
+            or limit_reached
+            or time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS
+        ):
+            await self.flush()
+        
+        if limit_reached:
+            logger.info("Reached message limit (%s). Stopping.", self.message_limit)
+        return limit_reached
+    
+    async def flush(self) -> None:
+        """Hand the buffered messages to a writer, or write them here outside run()."""
+        if not self._buffer:
+            return
+        
+        messages, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        self._submitted += len(messages)
+        if self._write_queue is not None:
+            # Blocks once every writer is busy and the queue is full, pushing back on the reader
+            await self._write_queue.put(messages)
+            return
+        
         async with AsyncSessionLocal() as session:
-            try:
-                # Create repositories
-                user_repo = BlueskyUserRepository(session)
-                post_repo = BlueskyPostRepository(session)
-                raw_repo = RawMessageRepository(session)
-                
-                # Store raw message with error handling
+            await self._write_batch(
+                session,
+                BlueskyUserRepository(session),
+                BlueskyPostRepository(session),
+                RawMessageRepository(session),
+                messages,
+            )
+    
+    async def _writer(self, queue: asyncio.Queue) -> None:
+        """Write batches from the queue until cancelled, with one session and set of repositories."""
+        async with AsyncSessionLocal() as session:
+            user_repo = BlueskyUserRepository(session)
+            post_repo = BlueskyPostRepository(session)
+            raw_repo = RawMessageRepository(session)
+            while True:
+                messages = await queue.get()
                 try:
-                    await raw_repo.store_raw_message(message)
-                except Exception as e:
-                    logger.error(f"Error storing raw message: {e}")
-                    # Continue processing even if raw storage fails
-                
-                # Process based on message type
-                if message.kind == "identity" and message.identity:
-                    # Process identity message
-                    logger.info(f"Processing identity message for {message.identity.handle} (DID: {message.identity.did})")
-                    result = await user_repo.upsert_from_identity(message.identity)
-                    if result:
-                        logger.info(f"Successfully processed identity: {result.handle}")
-                        self.stats["users_created" if not hasattr(result, "id") else "users_updated"] += 1
-                    else:
-                        logger.warning("Failed to process identity message - no result returned")
-                
-                elif message.kind == "account" and message.account:
-                    # Process account message
-                    logger.info(f"Processing account message for DID: {message.account.did}")
-                    result = await user_repo.update_from_account(message.account)
-                    if result:
-                        logger.info(f"Successfully processed account: {result.handle}")
-                        self.stats["users_updated"] += 1
-                    else:
-                        logger.warning("Failed to process account message - no result returned")
-                
-                elif message.kind == "commit" and message.commit:
-                    # For commits, we need to get the user first
-                    logger.info(f"Processing commit message: {message.commit.collection}/{message.commit.rkey}")
-                    user = await user_repo.get_by_did(message.did)
-                    
-                    if not user:
-                        logger.warning(f"User not found for DID: {message.did}, creating placeholder")
-                        # Create a placeholder user if not found
-                        user = await user_repo.create({
-                            "did": message.did,
-                            "handle": f"unknown-{message.did[-8:]}",
-                            "seq": 0,
-                            "bsky_timestamp": datetime.now(),
-                            "active": True
-                        })
-                        logger.info(f"Created placeholder user: {user.handle}")
-                    
-                    if user and message.commit.collection and message.commit.collection.startswith("app.bsky.feed."):
-                        logger.info(f"Processing post from {user.handle}: {message.commit.operation}")
-                        result = await post_repo.process_post_commit(message.commit, user)
-                        if result:
-                            logger.info(f"Successfully processed post: {result.uri}")
-                            if message.commit.operation == "delete":
-                                self.stats["posts_deleted"] += 1
-                            elif message.commit.operation == "create":
-                                self.stats["posts_created"] += 1
-                            else:
-                                self.stats["posts_updated"] += 1
-                        else:
-                            logger.warning("Failed to process post - no result returned")
+                    await self._write_batch(session, user_repo, post_repo, raw_repo, messages)
+                finally:
+                    queue.task_done()
+    
+    async def _write_batch(
+        self,
+        session: AsyncSession,
+        user_repo: BlueskyUserRepository,
+        post_repo: BlueskyPostRepository,
+        raw_repo: RawMessageRepository,
+        messages: List[Message],
+    ) -> None:
+        """Write a batch of messages to the database in one transaction."""
+        try:
+            # Archive every raw message with one COPY
+            await raw_repo.copy_raw_messages(messages)
+            
+            # Identity and account upserts compare seq in SQL, so each kind is
+            # one statement per batch regardless of message order
+            # Writers run concurrently, so rows are locked in DID order to avoid deadlocks
+            identities = sorted(
+                (m.identity for m in messages if m.kind == "identity" and m.identity),
+                key=lambda identity: identity.did,
+            )
+            if identities:
+                users = await user_repo.upsert_many_identities(identities)
+                created = sum(was_inserted for _, was_inserted in users)
+                self.stats["users_created"] += created
+                self.stats["users_updated"] += len(users) - created
+            
+            accounts = sorted(
+                (m.account for m in messages if m.kind == "account" and m.account),
+                key=lambda account: account.did,
+            )
+            if accounts:
+                users = await user_repo.update_many_accounts(accounts)
+                created = sum(was_inserted for _, was_inserted in users)
+                self.stats["users_created"] += created
+                self.stats["users_updated"] += len(users) - created
+            
+            # Resolve every commit author at once, creating placeholders for unknown ones
+            commits = [m for m in messages if m.kind == "commit" and m.commit]
+            authors = {m.did for m in commits}
+            refs = await user_repo.resolve_dids(list(authors))
+            if len(refs) < len(authors):
+                missing = sorted(did for did in authors if did not in refs)
+                refs.update(await user_repo.create_placeholders(missing))
+                self.stats["users_created"] += len(missing)
+            
+            # Posts apply in stream order, so a delete follows its create
+            for message in commits:
+                commit = message.commit
+                assert commit is not None
+                result = await post_repo.process_post_commit(commit, refs[message.did])
+                if result:
+                    if commit.operation == "delete":
+                        self.stats["posts_deleted"] += 1
+                    elif commit.operation == "create":
+                        self.stats["posts_created"] += 1
                     else:
-                        if not user:
-                            logger.warning("Failed to get or create user")
-                        elif not message.commit.collection:
-                            logger.warning("No collection in commit")
-                        elif not message.commit.collection.startswith("app.bsky.feed."):
-                            logger.info(f"Skipping non-post collection: {message.commit.collection}")
-                
-                # Commit the transaction
-                await session.commit()
-                
-                # Update stats
-                self.stats["messages_processed"] += 1
-                
-                # Print stats periodically
-                if self.stats["messages_processed"] % 10 == 0:
-                    await self.print_stats()
-                
-                # Check if we've reached the limit
-                if self.message_limit and self.stats["messages_processed"] >= self.message_limit:
-                    logger.info(f"Reached message limit ({self.message_limit}). Stopping.")
-                    return True  # Signal to stop
-                
-                return False  # Continue processing
-                
-            except Exception as e:
-                logger.error(f"Error processing message: {e}")
-                await session.rollback()
-                self.stats["errors"] += 1
-                return False
+                        self.stats["posts_updated"] += 1
+            
+            # Commit the whole batch at once
+            await session.commit()
+            
+            self.stats["messages_processed"] += len(messages)
+            logger.info("Wrote batch of %s messages", len(messages))
+            
+        except Exception as e:
+            logger.error("Error processing batch of %s messages: %s", len(messages), e)
+            await session.rollback()
+            self.stats["errors"] += 1
+        finally:
+            # The writer's session outlives the batch; drop its rows so the identity map stays small
+            session.expunge_all()
     
     async def run(self):
         """Run the test."""
@@ -293,41 +381,52 @@ class JetstreamDbTest:
         # Initialize database
         await self.initialize_db()
         
-        # Check initial database stats
-        await self.check_database_stats()
-        
-        # Examine raw messages if there are any
-        await self.examine_raw_messages()
+        # Check initial database stats and examine raw messages if there are any;
+        # both are read-only and use their own sessions, so they run concurrently
+        await asyncio.gather(self.check_database_stats(), self.examine_raw_messages())
         
         # Create Jetstream client
         jetstream = JetstreamClient()
         
+        # Statistics are printed on a timer, off the message path
+        stats_task = asyncio.create_task(self._stats_printer())
+        
         try:
             # Connect to Bluesky Jetstream
             logger.info("Connecting to Bluesky Jetstream...")
             
-            # Process messages
-            stop_requested = False
-            async for message in jetstream.subscribe():
-                if stop_requested:
-                    break
-                
-                # Process the message
-                stop_requested = await self.process_message(message)
+            # Batches are written by a pool of writers, so reading the stream
+            # continues while earlier batches wait on the database
+            queue: asyncio.Queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+            self._write_queue = queue
+            writers = [asyncio.create_task(self._writer(queue)) for _ in range(self.writers)]
+            try:
+                # Process messages a batch at a time, as many as arrived together
+                async for batch in jetstream.subscribe_batched(max_batch=SUBSCRIBE_BATCH_SIZE):
+                    if await self.process_batch(batch):
+                        break
+            finally:
+                # Queue whatever is still buffered and wait for every batch to be written
+                await self.flush()
+                await queue.join()
+                self._write_queue = None
+                for writer in writers:
+                    writer.cancel()
+                await asyncio.gather(*writers, return_exceptions=True)
             
         except KeyboardInterrupt:
             logger.info("Test interrupted. Shutting down...")
         except Exception as e:
-            logger.error(f"Error in test: {e}")
+            logger.error("Error in test: %s", e)
             self.stats["errors"] += 1
         finally:
             # Clean up
+            stats_task.cancel()
             await jetstream.close()
             
             # Print final statistics
             await self.print_stats()
-            await self.check_database_stats()
-            await self.examine_raw_messages()
+            await asyncio.gather(self.check_database_stats(), self.examine_raw_messages())
             
             logger.info("Jetstream DB test completed.")
 
@@ -336,10 +435,15 @@ async def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Test Bluesky Jetstream to PostgreSQL data flow")
     parser.add_argument("--limit", type=int, default=200, help="Number of messages to process")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Messages written per transaction")
+    parser.add_argument("--writers", type=int, default=WRITER_COUNT, help="Batches written concurrently")
+    parser.add_argument("--exact", action="store_true", help="Report exact row counts instead of estimates")
     args = parser.parse_args()
     
     # Run the test
-    test = JetstreamDbTest(message_limit=args.limit)
+    test = JetstreamDbTest(
+        message_limit=args.limit, batch_size=args.batch_size, exact_counts=args.exact, writers=args.writers
+    )
     await test.run()
 
 if __name__ == "__main__":
@@ -1,46 +1,62 @@
+import asyncio
 import pytest
 from datetime import datetime, timezone
 import logging
+import orjson
 from app.services.kafka_client import KafkaClient
 
 logger = logging.getLogger(__name__)
 
+# Messages published per test run
+MESSAGE_COUNT = 10
+
 @pytest.mark.asyncio
 async def test_kafka_message_processing(kafka_client: KafkaClient):
-    """Test the processing of a single message through Kafka"""
+    """Test the processing of a batch of messages through Kafka"""
     test_did = "did:test:123"
     test_collection = "app.bsky.feed.post"
-    test_rkey = "test-rkey"
     
-    kafka_message = {
-        "id": f"{test_did}:{test_collection}:{test_rkey}",
-        "timestamp": int(datetime.now(timezone.utc).timestamp() * 1_000_000),
-        "did": test_did,
-        "operation": "create",
-        "collection": test_collection,
-        "record": {
-            "$type": "app.bsky.feed.post",
-            "createdAt": datetime.now(timezone.utc).isoformat(),
-            "text": "test"
+    now = datetime.now(timezone.utc)
+    kafka_messages = [
+        {
+            "id": f"{test_did}:{test_collection}:test-rkey-{i}",
+            "timestamp": int(now.timestamp() * 1_000_000) + i,
+            "did": test_did,
+            "operation": "create",
+            "collection": test_collection,
+            "record": {
+                "$type": "app.bsky.feed.post",
+                "createdAt": now.isoformat(),
+                "text": f"test {i}"
+            }
         }
-    }
-    logger.debug(f"Created test message: {kafka_message}")
+        for i in range(MESSAGE_COUNT)
+    ]
+    logger.debug("Created %s test messages", len(kafka_messages))
     
     try:
-        logger.info("Producing message to Kafka...")
-        await kafka_client.produce_msg('bsky-posts', kafka_message)
+        await kafka_client.ensure_started()
+        assert kafka_client.consumer is not None
+        kafka_client.consumer.subscribe(['bsky-posts'])
+        
+        # Publish everything first, then wait for all acknowledgements at once
+        logger.info("Producing messages to Kafka...")
+        futures = [await kafka_client.produce_msg_async('bsky-posts', msg) for msg in kafka_messages]
+        await asyncio.gather(*futures)
         
         logger.info("Consuming messages from Kafka...")
         messages = []
         async for msg in kafka_client.consume_msg():
-            messages.append(msg)
-            if len(messages) >= 1:
+            # The consumer has no value deserializer, so values arrive as JSON bytes
+            messages.append(orjson.loads(msg))
+            if len(messages) >= MESSAGE_COUNT:
                 break
         
-        logger.info(f"Received {len(messages)} messages")
-        assert len(messages) == 1
-        assert messages[0]['did'] == test_did
-        assert messages[0]['collection'] == test_collection
+        logger.info("Received %s messages", len(messages))
+        assert len(messages) == MESSAGE_COUNT
+        assert all(message['did'] == test_did for message in messages)
+        assert all(message['collection'] == test_collection for message in messages)
+        assert {message['id'] for message in messages} == {msg['id'] for msg in kafka_messages}
     except Exception as e:
-        logger.exception(f"Error during test: {e}")
-        raise
\ No newline at end of file
+        logger.exception("Error during test: %s", e)
+        raise
@@ -0,0 +1,68 @@
+"""
+Tests for the persistence worker's message parsing and rebalance handling.
+
+These need no Kafka or PostgreSQL: parse_message is a pure function and the
+rebalance listener only calls back into the worker.
+"""
+
+import orjson
+import pytest
+
+from app.models.jetstream_types import Message
+from app.workers.persistence import CommitOnRevokeListener, parse_message
+
+IDENTITY_MESSAGE = {
+    "did": "did:plc:test",
+    "time_us": 1725911162329308,
+    "kind": "identity",
+    "identity": {
+        "did": "did:plc:test",
+        "handle": "test.bsky.social",
+        "seq": 1409752997,
+        "time": "2024-09-05T06:11:04.870Z",
+    },
+}
+
+
+@pytest.mark.parametrize("raw_data", [
+    orjson.dumps(IDENTITY_MESSAGE),
+    orjson.dumps(IDENTITY_MESSAGE).decode(),
+    IDENTITY_MESSAGE,
+])
+def test_parse_message_accepts_bytes_str_and_dict(raw_data):
+    message = parse_message(raw_data)
+    assert isinstance(message, Message)
+    assert message.kind == "identity"
+    assert message.identity.handle == "test.bsky.social"
+
+
+@pytest.mark.parametrize("raw_data", [
+    b"not json",
+    orjson.dumps({**IDENTITY_MESSAGE, "kind": "unknown"}),
+    {"did": "did:plc:test"},
+    None,
+])
+def test_parse_message_returns_none_for_invalid_input(raw_data):
+    assert parse_message(raw_data) is None
+
+
+class StubWorker:
+    """Records commit_offsets calls in place of a PersistenceWorker"""
+
+    def __init__(self) -> None:
+        self.commits = 0
+
+    async def commit_offsets(self) -> None:
+        self.commits += 1
+
+
+@pytest.mark.asyncio
+async def test_listener_commits_offsets_on_revoke():
+    worker = StubWorker()
+    listener = CommitOnRevokeListener(worker)
+
+    await listener.on_partitions_assigned(set())
+    assert worker.commits == 0
+
+    await listener.on_partitions_revoked(set())
+    assert worker.commits == 1
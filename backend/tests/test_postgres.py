@@ -23,6 +23,14 @@ from app.services.db_test import test_database_connection
 setup_local_logging()
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round-trip when streaming full tables
+STREAM_YIELD_PER = 200
+
+# Built once so repeated runs reuse the compiled statements. Both are streamed
+# with a server-side cursor, so memory stays bounded however large the tables grow
+_ALL_USERS_QUERY = select(BlueskyUser).execution_options(yield_per=STREAM_YIELD_PER)
+_ALL_POSTS_QUERY = select(BlueskyPost).execution_options(yield_per=STREAM_YIELD_PER)
+
 
 async def test_create_user():
     """Test creating a BlueskyUser in the database."""
@@ -41,11 +49,11 @@ async def test_create_user():
             session.add(test_user)
             await session.commit()
             
-            logger.info(f"Created test user: {test_user.handle} (ID: {test_user.id})")
+            logger.info("Created test user: %s (ID: %s)", test_user.handle, test_user.id)
             return test_user.id
         except Exception as e:
             await session.rollback()
-            logger.error(f"Error creating test user: {e}")
+            logger.error("Error creating test user: %s", e)
             raise
 
 
@@ -72,11 +80,11 @@ async def test_create_post(user_id):
             session.add(test_post)
             await session.commit()
             
-            logger.info(f"Created test post: {test_post.uri} (ID: {test_post.id})")
+            logger.info("Created test post: %s (ID: %s)", test_post.uri, test_post.id)
             return test_post.id
         except Exception as e:
             await session.rollback()
-            logger.error(f"Error creating test post: {e}")
+            logger.error("Error creating test post: %s", e)
             raise
 
 
@@ -85,26 +93,24 @@ async def test_query_data():
     async with AsyncSessionLocal() as session:
         try:
             # Query users
-            user_query = select(BlueskyUser)
-            user_result = await session.execute(user_query)
-            users = user_result.scalars().all()
-            
-            logger.info(f"Found {len(users)} users in the database:")
-            for user in users:
-                logger.info(f"  - {user.handle} (DID: {user.did})")
+            logger.info("Users in the database:")
+            user_count = 0
+            async for user in await session.stream_scalars(_ALL_USERS_QUERY):
+                logger.info("  - %s (DID: %s)", user.handle, user.did)
+                user_count += 1
+            logger.info("Found %s users in the database", user_count)
             
             # Query posts
-            post_query = select(BlueskyPost)
-            post_result = await session.execute(post_query)
-            posts = post_result.scalars().all()
-            
-            logger.info(f"Found {len(posts)} posts in the database:")
-            for post in posts:
-                logger.info(f"  - {post.uri}: '{post.text[:50]}...' (User ID: {post.user_id})")
+            logger.info("Posts in the database:")
+            post_count = 0
+            async for post in await session.stream_scalars(_ALL_POSTS_QUERY):
+                logger.info("  - %s: '%s...' (User ID: %s)", post.uri, post.text[:50], post.user_id)
+                post_count += 1
+            logger.info("Found %s posts in the database", post_count)
             
-            return len(users), len(posts)
+            return user_count, post_count
         except Exception as e:
-            logger.error(f"Error querying data: {e}")
+            logger.error("Error querying data: %s", e)
             raise
 
 
@@ -125,26 +131,26 @@ async def run_postgres_tests():
         await init_db()
         logger.info("Database initialized successfully.")
     except Exception as e:
-        logger.error(f"Database initialization failed: {e}")
+        logger.error("Database initialization failed: %s", e)
         return
     
     # Run tests
     try:
         # Create user
         user_id = await test_create_user()
-        logger.info(f"User created with ID: {user_id}")
+        logger.info("User created with ID: %s", user_id)
         
         # Create post
         post_id = await test_create_post(user_id)
-        logger.info(f"Post created with ID: {post_id}")
+        logger.info("Post created with ID: %s", post_id)
         
         # Query data
         user_count, post_count = await test_query_data()
-        logger.info(f"Query test complete. Found {user_count} users and {post_count} posts.")
+        logger.info("Query test complete. Found %s users and %s posts.", user_count, post_count)
         
         logger.info("All PostgreSQL tests completed successfully.")
     except Exception as e:
-        logger.error(f"Test failed: {e}")
+        logger.error("Test failed: %s", e)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""
+Tests for the Bluesky repositories against a PostgreSQL container.
+
+Covers the seq-guarded user upsert, placeholder creation racing an existing
+user, and claim_batch handing each raw message to a single worker.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.jetstream_types import MESSAGE_ADAPTER, Identity, Message
+from app.repositories.bluesky import BlueskyUserRepository, RawMessageRepository
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_identity(did: str, handle: str, seq: int) -> Identity:
+    return Identity(did=did, handle=handle, seq=seq, time=NOW)
+
+
+def make_message(did: str, time_us: int) -> Message:
+    return MESSAGE_ADAPTER.validate_python({
+        "did": did,
+        "time_us": time_us,
+        "kind": "identity",
+        "identity": {"did": did, "handle": "test.bsky.social", "seq": time_us, "time": NOW},
+    })
+
+
+@pytest.mark.asyncio
+async def test_upsert_skips_stale_seq(db_session):
+    """An identity with an older seq leaves the stored user untouched."""
+    repo = BlueskyUserRepository(db_session)
+    [(user, was_inserted)] = await repo.upsert_many_identities([make_identity("did:plc:a", "current", 5)])
+    await db_session.commit()
+    assert was_inserted
+
+    assert await repo.upsert_many_identities([make_identity("did:plc:a", "stale", 3)]) == []
+    await db_session.commit()
+
+    stored = await repo.get_by_did("did:plc:a")
+    assert stored.handle == "current"
+    assert stored.seq == 5
+
+
+@pytest.mark.asyncio
+async def test_upsert_applies_newer_seq(db_session):
+    """An identity with a newer seq updates the existing user in place."""
+    repo = BlueskyUserRepository(db_session)
+    [(created, _)] = await repo.upsert_many_identities([make_identity("did:plc:a", "old", 5)])
+    await db_session.commit()
+
+    [(updated, was_inserted)] = await repo.upsert_many_identities([make_identity("did:plc:a", "new", 7)])
+    await db_session.commit()
+
+    assert not was_inserted
+    assert updated.id == created.id
+    assert updated.handle == "new"
+    assert updated.seq == 7
+
+
+@pytest.mark.asyncio
+async def test_upsert_mixed_batch(db_session):
+    """A batch reports inserts and updates separately and omits stale rows."""
+    repo = BlueskyUserRepository(db_session)
+    await repo.upsert_many_identities([
+        make_identity("did:plc:newer", "before", 5),
+        make_identity("did:plc:stale", "kept", 5),
+    ])
+    await db_session.commit()
+
+    results = await repo.upsert_many_identities([
+        make_identity("did:plc:newer", "after", 6),
+        make_identity("did:plc:stale", "dropped", 4),
+        make_identity("did:plc:fresh", "fresh", 1),
+        # Duplicate DIDs within a batch collapse to the highest seq
+        make_identity("did:plc:fresh", "fresher", 2),
+    ])
+    await db_session.commit()
+
+    by_did = {user.did: (user.handle, was_inserted) for user, was_inserted in results}
+    assert by_did == {
+        "did:plc:newer": ("after", False),
+        "did:plc:fresh": ("fresher", True),
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_placeholders_reads_back_existing_users(db_session):
+    """DIDs that already have a user resolve to that user instead of being dropped."""
+    repo = BlueskyUserRepository(db_session)
+    [(existing, _)] = await repo.upsert_many_identities([make_identity("did:plc:known", "known", 1)])
+    await db_session.commit()
+
+    resolved = await repo.create_placeholders(["did:plc:known", "did:plc:unknown", "did:plc:unknown"])
+    await db_session.commit()
+
+    assert set(resolved) == {"did:plc:known", "did:plc:unknown"}
+    assert resolved["did:plc:known"].id == existing.id
+    placeholder = await repo.get_by_did("did:plc:unknown")
+    assert resolved["did:plc:unknown"].id == placeholder.id
+    # The existing user is left as it was
+    assert (await repo.get_by_did("did:plc:known")).handle == "known"
+
+
+@pytest.mark.asyncio
+async def test_claim_batch_never_claims_a_row_twice(db_sessionmaker):
+    """Concurrent claims get disjoint rows, and claimed rows are not handed out again."""
+    async with db_sessionmaker() as session:
+        repo = RawMessageRepository(session)
+        for time_us in range(1, 6):
+            await repo.store_raw_message(make_message(f"did:plc:{time_us}", time_us))
+        await session.commit()
+
+    async with db_sessionmaker() as first, db_sessionmaker() as second:
+        # The first claim holds its row locks until commit, so the second skips them
+        first_claim = await RawMessageRepository(first).claim_batch(limit=2)
+        second_claim = await RawMessageRepository(second).claim_batch(limit=10)
+        await first.commit()
+        await second.commit()
+
+    first_ids = {message.id for message in first_claim}
+    second_ids = {message.id for message in second_claim}
+    assert len(first_ids) == 2
+    assert len(second_ids) == 3
+    assert first_ids.isdisjoint(second_ids)
+    # Oldest first
+    assert {message.time_us for message in first_claim} == {1, 2}
+
+    async with db_sessionmaker() as session:
+        assert await RawMessageRepository(session).claim_batch(limit=10) == []